@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it compresses the final body; gzipped JSON gets weak ETags
+    'core.middleware.JSONGZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Added Whitenoise
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -135,7 +138,33 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Covering index columns (Index.include) only apply on PostgreSQL; other
+# backends build the same index without them
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
 CORS_ALLOW_ALL_ORIGINS = True
+# Let browser clients revalidate with ETags and read polling hints
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag', 'Retry-After']
+
+# Equipment listing (/api/datasets/<id>/equipment/)
+EQUIPMENT_PAGE_SIZE = 1000
+EQUIPMENT_MAX_PAGE_SIZE = 10000
+
+# Rows converted per step when loading a dataset as NumPy columns
+COLUMNAR_CHUNK_SIZE = 50000
+# Rows fetched per database round trip by the streaming CSV/NDJSON export
+EXPORT_CHUNK_SIZE = 2000
+
+# Scatter points in the dashboard summary (?points=N, ?sampling=stratified|grid|lttb)
+SUMMARY_POINTS = 500
+SUMMARY_MAX_POINTS = 5000
+
+# Density grids (/api/datasets/<id>/density/): bins per axis
+DENSITY_BINS = 64
+DENSITY_MAX_BINS = 512
+# Bytes of metric columns each process keeps for re-binning density zoom windows
+COLUMN_STORE_MAX_BYTES = int(os.environ.get('COLUMN_STORE_MAX_BYTES', 256 * 1024 * 1024))
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -143,3 +172,84 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
     ]
 }
+
+# Caches
+# Summary/history payloads go to their own cache. LocMemCache evicts least
+# recently used entries past MAX_ENTRIES; point RESPONSE_CACHE_BACKEND at
+# FileBasedCache to share it between worker processes.
+
+RESPONSE_CACHE_ALIAS = 'responses'
+# Upload job progress and heartbeats, and report render claims and failures,
+# must be visible to whichever worker process answers the poll, so this one
+# is shared by default
+JOB_CACHE_ALIAS = 'jobs'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    RESPONSE_CACHE_ALIAS: {
+        'BACKEND': os.environ.get('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'responses'),
+        'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 3600)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 500)),
+        },
+    },
+    JOB_CACHE_ALIAS: {
+        'BACKEND': os.environ.get('JOB_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('JOB_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'jobs')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# CSV ingest
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 5000))
+INGEST_CHUNK_SIZE = int(os.environ.get('INGEST_CHUNK_SIZE', 50000))
+# 'auto' uses COPY FROM STDIN on PostgreSQL and batched INSERTs elsewhere
+INGEST_LOADER = os.environ.get('INGEST_LOADER', 'auto')
+
+# Serve summary, history and export from core.async_views; only useful under
+# an ASGI server (e.g. gunicorn config.asgi -k uvicorn.workers.UvicornWorker)
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Background upload jobs
+UPLOAD_JOB_WORKERS = int(os.environ.get('UPLOAD_JOB_WORKERS', 2))
+# Seconds without a heartbeat after which a queued or running job is taken to
+# have lost its worker (process restart or recycle) and is marked failed
+UPLOAD_JOB_STALE_AFTER = int(os.environ.get('UPLOAD_JOB_STALE_AFTER', 900))
+
+# Optional numeric limits: an empty (or unset, without default) variable disables the limit
+def _env_limit(name, default=None):
+    value = os.environ.get(name, default)
+    return int(value) if value not in (None, '') else None
+
+# PDF reports: 'background' renders once into a cache under MEDIA_ROOT/reports
+# and answers 202 meanwhile; 'stream' renders on every request into a spooled
+# temporary file (kept in memory up to REPORT_SPOOL_MAX_BYTES) and streams it
+REPORT_DELIVERY = os.environ.get('REPORT_DELIVERY', 'background')
+REPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+# Seconds clients are told to wait before polling a report that is rendering
+REPORT_RETRY_AFTER = 2
+# Seconds a render claim lasts; a render lost with its worker is retried after this
+REPORT_RENDER_TIMEOUT = int(os.environ.get('REPORT_RENDER_TIMEOUT', 600))
+# Equipment rows per table in the detailed log, and an optional cap on the log
+# (larger datasets get per-type summary pages instead of the remaining rows)
+REPORT_TABLE_CHUNK_ROWS = 200
+REPORT_MAX_DETAIL_ROWS = _env_limit('REPORT_MAX_DETAIL_ROWS')
+# Points drawn in the report's pressure vs temperature chart
+REPORT_CHART_POINTS = 2000
+# Report renders (single and batch) run in a process pool of this size
+REPORT_BATCH_WORKERS = int(os.environ.get('REPORT_BATCH_WORKERS', 2))
+REPORT_BATCH_MAX_IDS = 20
+
+# Dataset retention (core.retention)
+# Upload jobs prune after they finish unless RETENTION_PRUNE_AFTER_UPLOAD is off,
+# in which case run `manage.py prune_datasets` on a schedule instead.
+RETENTION_KEEP_LATEST = _env_limit('RETENTION_KEEP_LATEST', '5')
+RETENTION_MAX_AGE_DAYS = _env_limit('RETENTION_MAX_AGE_DAYS')
+RETENTION_MAX_ROWS = _env_limit('RETENTION_MAX_ROWS')
+RETENTION_PRUNE_AFTER_UPLOAD = os.environ.get('RETENTION_PRUNE_AFTER_UPLOAD', 'True') == 'True'
@@ -0,0 +1,128 @@
+"""Async versions of the hot read endpoints, for deployment under an ASGI server.
+
+Under a sync WSGI worker every request holds a worker for its whole
+duration, so a slow export or a cold summary blocks the others. These views
+await the ORM (and run NumPy sampling in a thread) instead, so one ASGI
+worker process serves many requests at once. They return the same bodies,
+headers and ETags as their DRF counterparts in ``views``, and replace them
+at the same URLs when ``ASYNC_READ_VIEWS`` is set.
+"""
+import os
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import cache as response_cache
+from . import etags
+from . import sampling
+from .columnar import ordered_rows
+from .loaders import COLUMN_MAP
+from .models import Dataset
+from .renderers import CSVRenderer, NDJSONRenderer
+from .serializers import DatasetListSerializer
+from .views import sampling_params, summary_payload
+
+EXPORT_RENDERERS = {renderer.format: renderer for renderer in (CSVRenderer(), NDJSONRenderer())}
+
+
+def json_response(data, status=200, headers=None):
+    # DRF's encoder, so UUIDs, datetimes and floats match the sync views byte for byte
+    return JsonResponse(data, status=status, headers=headers, encoder=JSONEncoder, safe=False)
+
+
+def not_found(detail=NotFound.default_detail):
+    """The body DRF renders for ``NotFound`` / ``Http404`` in the sync views."""
+    return json_response({"detail": str(detail)}, status=404)
+
+
+def async_condition(etag_func):
+    """``django.views.decorators.http.condition`` for an async view and async ``etag_func``."""
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+
+async def iterate_in_thread(iterator):
+    """Async iterator over a sync one, advanced in the request's ORM thread.
+
+    Used for export bodies: both the row fetch and the encoding stay off the
+    event loop, one thread hop per encoded chunk. ``QuerySet.aiterator()`` is
+    no help here, as it executes ``values_list()`` querysets on the loop.
+    """
+    next_item = sync_to_async(next)
+    while (item := await next_item(iterator, None)) is not None:
+        yield item
+
+
+@require_safe
+@async_condition(etags.asummary_etag)
+async def summary(request):
+    latest_dataset = await Dataset.objects.afirst()
+    if not latest_dataset:
+        return json_response({"message": "No data available"}, status=404)
+    try:
+        points, strategy = sampling_params(request.GET)
+    except ValidationError as e:
+        return json_response(e.detail, status=400)
+
+    async def build():
+        type_dist = [stats.as_distribution() async for stats in latest_dataset.type_stats.all()]
+        # Column fetch and sampling are NumPy work; keep them off the event loop
+        raw_data = await sync_to_async(sampling.sample_points)(latest_dataset, points, strategy)
+        return summary_payload(latest_dataset, type_dist, raw_data, strategy)
+
+    payload, hit = await response_cache.aget_or_set('summary', latest_dataset.pk, request.GET, build)
+    return json_response(payload, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+
+@require_safe
+@async_condition(etags.ahistory_list_etag)
+async def history_list(request):
+    datasets = [dataset async for dataset in Dataset.objects.all()]
+    return json_response(DatasetListSerializer(datasets, many=True).data)
+
+
+@require_safe
+async def dataset_export(request, pk):
+    # DRF negotiates the format before the view (and its ETag) runs, so an unknown
+    # format is a bare 404 even for a missing dataset
+    fmt = request.GET.get('format')
+    if fmt is None:
+        fmt = NDJSONRenderer.format if NDJSONRenderer.media_type in request.headers.get('Accept', '') else CSVRenderer.format
+    renderer = EXPORT_RENDERERS.get(fmt)
+    if renderer is None:
+        return not_found()
+    return await stream_export(request, pk, renderer)
+
+
+@async_condition(etags.adetail_etag('dataset_export'))
+async def stream_export(request, pk, renderer):
+    dataset = await Dataset.objects.filter(pk=pk).afirst()
+    if dataset is None:
+        # get_object_or_404's message, as the sync view reports it
+        return not_found(f"No {Dataset._meta.object_name} matches the given query.")
+
+    rows = ordered_rows(dataset, COLUMN_MAP).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    # CSV uses the upload headers so an export can be uploaded again as-is
+    columns = list(COLUMN_MAP.values()) if renderer.format == CSVRenderer.format else list(COLUMN_MAP)
+
+    response = StreamingHttpResponse(iterate_in_thread(renderer.stream(columns, rows)), content_type=renderer.media_type)
+    stem = os.path.splitext(dataset.filename)[0]
+    response['Content-Disposition'] = f'attachment; filename="{stem}.{renderer.format}"'
+    return response
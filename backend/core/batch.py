@@ -0,0 +1,181 @@
+"""Multi-dataset downloads: reports rendered in a process pool, streamed back as a ZIP.
+
+Reports are rendered by ``reports.render`` in worker processes, so they land
+in the same on-disk cache as single downloads, and ReportLab's CPU-bound
+layout never competes with request threads for the GIL. Single report
+downloads are rendered in the same pool, whose size bounds how many renders
+run at once.
+"""
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+
+from django.conf import settings
+
+from . import report_worker, reports
+from .columnar import ordered_rows
+from .loaders import COLUMN_MAP
+from .renderers import CSVRenderer
+
+COPY_CHUNK_SIZE = 256 * 1024
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool for batch renders, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that holds DB connections and threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.REPORT_BATCH_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=report_worker.init_worker,
+            )
+        return _pool
+
+
+def discard_pool(pool):
+    """Drop a broken pool (e.g. a worker was OOM-killed) so the next get_pool() builds a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable write target; ZipFile then streams entries with data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _entry_name(names, dataset, extension):
+    name = os.path.splitext(dataset.filename)[0] if extension == 'csv' else f"Report_{dataset.filename}"
+    if name in names:
+        # Uploads of the same file would otherwise overwrite each other in the archive
+        name = f"{name}_{dataset.pk}"
+    names.add(name)
+    return f"{name}.{extension}"
+
+
+def _open_cached(dataset):
+    """The dataset's cached report opened for reading, or None."""
+    path = reports.cached_report(dataset)
+    if path:
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            pass  # Evicted since the check
+    return None
+
+
+def submit(fn, *args):
+    """Run ``fn(*args)`` in the render pool, replacing the pool if it has broken."""
+    pool = get_pool()
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        discard_pool(pool)
+        return get_pool().submit(fn, *args)
+
+
+def _submit(dataset):
+    return submit(report_worker.render, dataset.pk)
+
+
+def _submit_reports(datasets):
+    """Split datasets into open cached reports ``(dataset, file)`` and pending renders ``{future: dataset}``."""
+    ready, pending = [], {}
+    for dataset in datasets:
+        source = _open_cached(dataset)
+        if source:
+            ready.append((dataset, source))
+        else:
+            pending[_submit(dataset)] = dataset
+    return ready, pending
+
+
+def _completed(pending):
+    """Yield ``(dataset, file, error)`` for pending renders in completion order.
+
+    A render is retried once if the pool broke under it, or if the report
+    was evicted again before it could be opened.
+    """
+    retried = set()
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            dataset = pending.pop(future)
+            try:
+                source = open(future.result(), 'rb')
+            except (BrokenProcessPool, FileNotFoundError) as e:
+                if dataset.pk in retried:
+                    yield dataset, None, str(e)
+                else:
+                    retried.add(dataset.pk)
+                    pending[_submit(dataset)] = dataset
+            except Exception as e:
+                yield dataset, None, str(e)
+            else:
+                yield dataset, source, None
+
+
+def stream_zip(datasets, formats=('pdf',)):
+    """Yield a ZIP archive of the datasets' reports (and CSV exports) chunk by chunk."""
+    return (chunk for chunk in _zip_chunks(datasets, formats) if chunk)
+
+
+def _zip_chunks(datasets, formats):
+    sink = _Sink()
+    names = set()
+    # Start the renders first so they overlap with the CSV entries
+    ready, pending = _submit_reports(datasets) if 'pdf' in formats else ([], {})
+    try:
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+            if 'csv' in formats:
+                renderer = CSVRenderer()
+                for dataset in datasets:
+                    rows = ordered_rows(dataset, COLUMN_MAP).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+                    with archive.open(_entry_name(names, dataset, 'csv'), 'w') as entry:
+                        for chunk in renderer.stream(list(COLUMN_MAP.values()), rows):
+                            entry.write(chunk)
+                            yield sink.drain()
+
+            reports_done = chain(((dataset, source, None) for dataset, source in ready), _completed(pending))
+            for dataset, source, error in reports_done:
+                if error:
+                    archive.writestr(_entry_name(names, dataset, 'error.txt'), f"Report rendering failed: {error}\n")
+                else:
+                    with source, archive.open(_entry_name(names, dataset, 'pdf'), 'w') as entry:
+                        while chunk := source.read(COPY_CHUNK_SIZE):
+                            entry.write(chunk)
+                            yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+    finally:
+        # If the client went away, drop the renders that have not started
+        for future in pending:
+            future.cancel()
+        for _, source in ready:
+            source.close()
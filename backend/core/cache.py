@@ -0,0 +1,108 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+_counters = {'hits': 0, 'misses': 0}
+_counters_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(dataset_id):
+    return f"version:{dataset_id}"
+
+
+def dataset_version(dataset_id):
+    """Current cache version of a dataset.
+
+    A missing version (never set, evicted or invalidated) is replaced by a
+    fresh token, so entries written under an older version are never served.
+    """
+    cache = get_cache()
+    key = _version_key(dataset_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def adataset_version(dataset_id):
+    cache = get_cache()
+    key = _version_key(dataset_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def cache_key(endpoint, dataset_id, params=None, vary=None):
+    # QueryDicts keep repeated parameters, so compare them as lists
+    items = params.lists() if hasattr(params, 'lists') else (params or {}).items()
+    digest = hashlib.md5(repr((sorted(items), vary)).encode()).hexdigest()
+    return f"{endpoint}:{dataset_id}:{digest}"
+
+
+def get_or_set(endpoint, dataset_id, params, compute, vary=None):
+    """Return ``(value, hit)`` for an endpoint's payload, computing it on a miss.
+
+    ``vary`` distinguishes payloads that depend on more than the query string,
+    such as absolute URLs built from the request host.
+    """
+    cache = get_cache()
+    key = cache_key(endpoint, dataset_id, params, vary)
+    version = dataset_version(dataset_id)
+    value = cache.get(key, version=version)
+    hit = value is not None
+    if not hit:
+        value = compute()
+        cache.set(key, value, version=version)
+    _count('hits' if hit else 'misses')
+    return value, hit
+
+
+async def aget_or_set(endpoint, dataset_id, params, compute, vary=None):
+    """Async ``get_or_set``; ``compute`` is a coroutine function."""
+    cache = get_cache()
+    key = cache_key(endpoint, dataset_id, params, vary)
+    version = await adataset_version(dataset_id)
+    value = await cache.aget(key, version=version)
+    hit = value is not None
+    if not hit:
+        value = await compute()
+        await cache.aset(key, value, version=version)
+    _count('hits' if hit else 'misses')
+    return value, hit
+
+
+def invalidate(dataset_id):
+    """Drop every cached payload of a dataset by moving it to a new version."""
+    get_cache().delete(_version_key(dataset_id))
+
+
+def _count(counter):
+    with _counters_lock:
+        _counters[counter] += 1
+
+
+def stats():
+    """Hit/miss counters of this process since start (or the last reset)."""
+    with _counters_lock:
+        hits, misses = _counters['hits'], _counters['misses']
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / lookups if lookups else 0.0,
+    }
+
+
+def reset_stats():
+    with _counters_lock:
+        _counters.update(hits=0, misses=0)
@@ -0,0 +1,105 @@
+"""Charts for the PDF report, rendered headless with Matplotlib's Agg backend.
+
+Both charts are drawn from bounded inputs (the per-type stats and a strided
+point sample), so their cost does not grow with the dataset. The PNGs are
+cached under ``MEDIA_ROOT/charts/<dataset id>/``.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .sampling import strided_points
+
+# Bump when a chart's look changes so cached PNGs are redrawn
+CHART_VERSION = 1
+
+PRIMARY = "#0ea5e9"
+SECONDARY = "#8b5cf6"
+TEXT = "#334155"
+GRID = "#e2e8f0"
+
+SIZE = (7.0, 3.2)  # inches
+DPI = 150
+
+
+def chart_dir(dataset_id):
+    return os.path.join(settings.MEDIA_ROOT, 'charts', str(dataset_id))
+
+
+def _new_figure():
+    # A bare Figure with its own Agg canvas: no pyplot state, safe in worker threads
+    figure = Figure(figsize=SIZE, dpi=DPI)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _style(ax, xlabel, ylabel):
+    ax.set_xlabel(xlabel, color=TEXT)
+    ax.set_ylabel(ylabel, color=TEXT)
+    ax.tick_params(colors=TEXT, labelsize=8)
+    ax.grid(True, color=GRID, linewidth=0.6)
+    ax.set_axisbelow(True)
+    for spine in ('top', 'right'):
+        ax.spines[spine].set_visible(False)
+
+
+def draw_type_distribution(dataset, figure):
+    stats = list(dataset.type_stats.all())
+    ax = figure.add_subplot()
+    ax.bar([s.equipment_type for s in stats], [s.count for s in stats], color=PRIMARY)
+    ax.set_title("Equipment Type Distribution", color=TEXT, fontsize=11)
+    _style(ax, "Type", "Count")
+    if len(stats) > 6:
+        ax.tick_params(axis='x', labelrotation=30)
+
+
+def draw_pressure_temperature(dataset, figure):
+    points = strided_points(dataset, settings.REPORT_CHART_POINTS)
+    ax = figure.add_subplot()
+    ax.scatter([p['temperature'] for p in points], [p['pressure'] for p in points],
+               s=6, alpha=0.5, color=SECONDARY, linewidths=0)
+    ax.set_title(f"Pressure vs Temperature ({len(points):,} of {dataset.total_records:,} points)",
+                 color=TEXT, fontsize=11)
+    _style(ax, "Temperature (°C)", "Pressure (PSI)")
+
+
+CHARTS = {
+    'type_distribution': draw_type_distribution,
+    'pressure_temperature': draw_pressure_temperature,
+}
+
+
+def chart_path(dataset_id, name):
+    # The point budget is part of the name so changing it redraws the charts
+    return os.path.join(chart_dir(dataset_id), f"{name}-v{CHART_VERSION}-{settings.REPORT_CHART_POINTS}.png")
+
+
+def chart_png(dataset, name):
+    """Path of a chart's PNG for a dataset, drawing it on first use."""
+    path = chart_path(dataset.pk, name)
+    if os.path.exists(path):
+        return path
+
+    figure = _new_figure()
+    CHARTS[name](dataset, figure)
+    figure.tight_layout()
+    os.makedirs(chart_dir(dataset.pk), exist_ok=True)
+    # Write beside the final path and rename, so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=chart_dir(dataset.pk), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            figure.savefig(file, format='png', facecolor='white')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def discard(dataset_id):
+    """Remove every cached chart of a dataset."""
+    shutil.rmtree(chart_dir(dataset_id), ignore_errors=True)
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .models import Equipment
+
+METRICS = ('flowrate', 'pressure', 'temperature')
+
+
+def _dtype(field):
+    if field in ('equipment_type', 'equipment_name'):
+        return object
+    return np.int64 if field == 'id' else np.float64
+
+
+def ordered_rows(dataset, fields):
+    """A dataset's rows as ``fields`` tuples in id (upload) order.
+
+    Read in order from equipment_dataset_id_idx, so a streamed body can
+    start with the first row instead of waiting for a sort of the dataset.
+    """
+    return Equipment.objects.filter(dataset=dataset).order_by('id').values_list(*fields)
+
+
+def fetch_columns(dataset, metrics=METRICS, with_types=True, with_ids=False, with_names=False):
+    """Load a dataset's equipment as NumPy columns with a single ordered scan.
+
+    Rows are pulled from the cursor in chunks and converted column by column,
+    so the only per-row Python objects alive at once are one chunk's tuples.
+    The type column is dictionary-encoded as ``type_codes`` indexing into
+    the sorted ``type_labels``.
+    """
+    fields = [*metrics]
+    if with_types:
+        fields.append('equipment_type')
+    if with_ids:
+        fields.append('id')
+    if with_names:
+        fields.append('equipment_name')
+
+    parts = {field: [] for field in fields}
+    rows = ordered_rows(dataset, fields).iterator(chunk_size=settings.COLUMNAR_CHUNK_SIZE)
+    while chunk := list(islice(rows, settings.COLUMNAR_CHUNK_SIZE)):
+        for field, values in zip(fields, zip(*chunk)):
+            parts[field].append(np.array(values, dtype=_dtype(field)))
+
+    columns = {
+        field: np.concatenate(parts[field]) if parts[field] else np.empty(0, dtype=_dtype(field))
+        for field in fields
+    }
+
+    if with_types:
+        codes, labels = pd.factorize(columns.pop('equipment_type'), sort=True)
+        columns['type_codes'] = codes.astype(np.min_scalar_type(max(len(labels) - 1, 0)))
+        columns['type_labels'] = np.array(labels, dtype=str)
+    return columns
+
+
+# Per-process LRU of metric columns for re-binning, bounded by array bytes
+_column_store = OrderedDict()
+_column_store_bytes = 0
+_column_store_lock = threading.Lock()
+
+
+def cached_columns(dataset, metrics=METRICS):
+    """``fetch_columns(dataset, metrics, with_types=False)``, kept in this process.
+
+    Datasets never change after upload, so the arrays stay valid until
+    evicted. They are held as-is rather than pickled into a response cache,
+    and least recently used datasets are dropped once the store passes
+    ``COLUMN_STORE_MAX_BYTES``.
+    """
+    global _column_store_bytes
+    key = (dataset.pk, tuple(metrics))
+    with _column_store_lock:
+        columns = _column_store.get(key)
+        if columns is not None:
+            _column_store.move_to_end(key)
+            return columns
+
+    columns = fetch_columns(dataset, metrics, with_types=False)
+    with _column_store_lock:
+        if key not in _column_store:
+            _column_store[key] = columns
+            _column_store_bytes += _nbytes(columns)
+        while _column_store and _column_store_bytes > settings.COLUMN_STORE_MAX_BYTES:
+            _, evicted = _column_store.popitem(last=False)
+            _column_store_bytes -= _nbytes(evicted)
+    return columns
+
+
+def _nbytes(columns):
+    return sum(column.nbytes for column in columns.values())
+
+
+def clear_cached_columns():
+    global _column_store_bytes
+    with _column_store_lock:
+        _column_store.clear()
+        _column_store_bytes = 0
@@ -0,0 +1,100 @@
+"""ETag functions for the read endpoints, for use with ``django.views.decorators.http.condition``.
+
+Datasets never change after upload, so a dataset's id and upload date fully
+identify every payload derived from it. Query parameters and the Accept header
+are mixed in because they select different representations of the same dataset.
+"""
+import hashlib
+import os
+
+from django.db.models import Count, Max, Min
+
+from . import reports
+from .models import Dataset
+
+# Bump when a response body changes shape, so clients drop their stored copies
+PAYLOAD_VERSION = 3
+
+
+def _digest(*parts):
+    return hashlib.md5('|'.join(str(p) for p in parts).encode()).hexdigest()
+
+
+def _variant(request):
+    # Query string and Accept header both select the representation
+    return sorted(request.GET.lists()), request.META.get('HTTP_ACCEPT', '')
+
+
+def dataset_etag(endpoint, dataset_id, upload_date, request, *vary):
+    return _digest(PAYLOAD_VERSION, endpoint, dataset_id, upload_date.isoformat(), _variant(request), *vary)
+
+
+def absolute_base(request):
+    """Scheme and host that absolute URLs in a body are built from."""
+    return request.build_absolute_uri('/')
+
+
+def history_version():
+    """Token that changes whenever a dataset is added to or pruned from the history."""
+    stats = Dataset.objects.aggregate(count=Count('id'), newest=Max('upload_date'), oldest=Min('upload_date'))
+    return _digest(stats['count'], stats['newest'], stats['oldest'])
+
+
+def summary_etag(request, *args, **kwargs):
+    latest = Dataset.objects.values_list('id', 'upload_date').first()
+    if latest is None:
+        return None
+    return dataset_etag('summary', *latest, request)
+
+
+def history_list_etag(request, *args, **kwargs):
+    return _digest(PAYLOAD_VERSION, 'history', history_version(), _variant(request))
+
+
+def detail_etag(endpoint, vary=None):
+    """ETag function for a per-dataset endpoint routed with ``<uuid:pk>``.
+
+    ``vary(request)`` is mixed in for bodies that depend on more than the
+    query string and Accept header, such as ``absolute_base``.
+    """
+    def etag_func(request, pk, *args, **kwargs):
+        upload_date = Dataset.objects.filter(pk=pk).values_list('upload_date', flat=True).first()
+        if upload_date is None:
+            return None
+        return dataset_etag(endpoint, pk, upload_date, request, *([vary(request)] if vary else []))
+    return etag_func
+
+
+# Async counterparts for core.async_views; the sync ORM cannot be used inside an event loop
+
+async def ahistory_version():
+    stats = await Dataset.objects.aaggregate(count=Count('id'), newest=Max('upload_date'), oldest=Min('upload_date'))
+    return _digest(stats['count'], stats['newest'], stats['oldest'])
+
+
+async def asummary_etag(request, *args, **kwargs):
+    latest = await Dataset.objects.values_list('id', 'upload_date').afirst()
+    if latest is None:
+        return None
+    return dataset_etag('summary', *latest, request)
+
+
+async def ahistory_list_etag(request, *args, **kwargs):
+    return _digest(PAYLOAD_VERSION, 'history', await ahistory_version(), _variant(request))
+
+
+def adetail_etag(endpoint, vary=None):
+    async def etag_func(request, pk, *args, **kwargs):
+        upload_date = await Dataset.objects.filter(pk=pk).values_list('upload_date', flat=True).afirst()
+        if upload_date is None:
+            return None
+        return dataset_etag(endpoint, pk, upload_date, request, *([vary(request)] if vary else []))
+    return etag_func
+
+
+def report_etag(request, pk, *args, **kwargs):
+    # Only a rendered report has a validator; a 202 "rendering" reply must not be cached
+    upload_date = Dataset.objects.filter(pk=pk).values_list('upload_date', flat=True).first()
+    if upload_date is None or not os.path.exists(reports.report_path(pk, upload_date)):
+        return None
+    return dataset_etag('pdf_report', pk, upload_date, request)
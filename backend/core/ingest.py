@@ -0,0 +1,154 @@
+import logging
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+import pandas as pd
+
+from .loaders import COLUMN_MAP, NUMERIC_FIELDS, get_loader
+from .models import DatasetTypeStats
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = set(COLUMN_MAP.values())
+
+
+class SchemaError(ValueError):
+    pass
+
+
+@dataclass
+class IngestResult:
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class RunningStats:
+    """Running totals folded chunk by chunk, so summary stats need no full frame."""
+
+    def __init__(self):
+        self.rows = 0
+        self.sums = dict.fromkeys(NUMERIC_FIELDS, 0.0)
+        self.counts = dict.fromkeys(NUMERIC_FIELDS, 0)
+        self.types = {}  # equipment type -> DatasetTypeStats field values
+
+    def update(self, df):
+        self.rows += len(df)
+        values = pd.DataFrame({field: df[COLUMN_MAP[field]].astype('float64') for field in NUMERIC_FIELDS})
+        for field in NUMERIC_FIELDS:
+            self.sums[field] += float(values[field].sum())
+            self.counts[field] += int(values[field].count())
+        self.update_types(values, df[COLUMN_MAP['equipment_type']].astype(str))
+
+    def update_types(self, values, types):
+        grouped = values.groupby(types)
+        counts = grouped.size()
+        sums, mins, maxs = grouped.sum(), grouped.min(), grouped.max()
+        sumsqs = (values ** 2).groupby(types).sum()
+        for equipment_type, count in counts.items():
+            totals = self.types.setdefault(equipment_type, {'count': 0})
+            totals['count'] += int(count)
+            for field in NUMERIC_FIELDS:
+                totals[f'{field}_sum'] = totals.get(f'{field}_sum', 0.0) + float(sums.at[equipment_type, field])
+                totals[f'{field}_sumsq'] = totals.get(f'{field}_sumsq', 0.0) + float(sumsqs.at[equipment_type, field])
+                totals[f'{field}_min'] = _fold(min, totals.get(f'{field}_min'), mins.at[equipment_type, field])
+                totals[f'{field}_max'] = _fold(max, totals.get(f'{field}_max'), maxs.at[equipment_type, field])
+
+    def mean(self, field):
+        # Matches DataFrame.mean(): NaNs are skipped, an empty column averages to 0
+        return self.sums[field] / self.counts[field] if self.counts[field] else 0.0
+
+    def apply_to(self, dataset):
+        dataset.total_records = self.rows
+        dataset.avg_flowrate = self.mean('flowrate')
+        dataset.avg_pressure = self.mean('pressure')
+        dataset.avg_temperature = self.mean('temperature')
+
+    def type_stats(self, dataset):
+        return [
+            DatasetTypeStats(dataset=dataset, equipment_type=equipment_type, **totals)
+            for equipment_type, totals in self.types.items()
+        ]
+
+
+def _fold(pick, current, value):
+    # NaN-aware min/max merge of a chunk's extreme into the running one
+    if pd.isna(value):
+        return current
+    return float(value) if current is None else pick(current, float(value))
+
+
+def normalize_columns(df):
+    # Normalize columns: lowercase, replace _ with space, strip units
+    df.columns = [str(c).split('(')[0].strip().replace('_', ' ').title() for c in df.columns]
+    return df
+
+
+def missing_columns(columns):
+    return REQUIRED_COLUMNS - set(columns)
+
+
+def ingest_frame(dataset, df, batch_size=None, loader=None):
+    """Write every row of a normalized frame for ``dataset`` in one transaction."""
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    loader = loader or get_loader()
+    started = time.perf_counter()
+    with transaction.atomic():
+        loader.load(dataset, df, batch_size)
+    result = IngestResult(rows=len(df), seconds=time.perf_counter() - started)
+    logger.debug("Ingested %d rows into %s in %.2fs (%.0f rows/s)",
+                result.rows, dataset.pk, result.seconds, result.rows_per_sec)
+    return result
+
+
+def check_header(file):
+    """Validate the header row of a CSV upload and rewind it."""
+    missing = missing_columns(normalize_columns(pd.read_csv(file, nrows=0)).columns)
+    file.seek(0)
+    if missing:
+        raise SchemaError(f"Missing columns. Required: {list(missing)}")
+
+
+def read_chunks(file, chunksize=None):
+    """Yield normalized frames of at most ``chunksize`` rows from a CSV upload.
+
+    The column schema is checked on the first chunk, before anything is written.
+    """
+    chunksize = chunksize or settings.INGEST_CHUNK_SIZE
+    for index, chunk in enumerate(pd.read_csv(file, chunksize=chunksize)):
+        normalize_columns(chunk)
+        if index == 0:
+            missing = missing_columns(chunk.columns)
+            if missing:
+                raise SchemaError(f"Missing columns. Required: {list(missing)}")
+        yield chunk
+
+
+def ingest_csv(dataset, file, chunksize=None, batch_size=None, progress=None):
+    """Stream a CSV upload into ``dataset`` chunk by chunk with bounded memory.
+
+    Each chunk is written as soon as it is parsed and folded into running
+    stats, which are stored on the dataset once the file is exhausted.
+    ``progress`` is called with the running row count after every chunk.
+    """
+    stats = RunningStats()
+    loader = get_loader()
+    started = time.perf_counter()
+    with transaction.atomic():
+        for chunk in read_chunks(file, chunksize):
+            ingest_frame(dataset, chunk, batch_size, loader)
+            stats.update(chunk)
+            if progress:
+                progress(stats.rows)
+        stats.apply_to(dataset)
+        dataset.save()
+        DatasetTypeStats.objects.bulk_create(stats.type_stats(dataset))
+    result = IngestResult(rows=stats.rows, seconds=time.perf_counter() - started)
+    logger.info("Streamed %d rows into %s in %.2fs (%.0f rows/s)",
+                result.rows, dataset.pk, result.seconds, result.rows_per_sec)
+    return result
@@ -0,0 +1,134 @@
+import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import cache as response_cache
+from . import retention
+from .ingest import SchemaError, ingest_csv
+from .models import Dataset, UploadJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide worker pool for upload jobs, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.UPLOAD_JOB_WORKERS,
+                thread_name_prefix='upload-job',
+            )
+        return _executor
+
+
+def job_cache():
+    return caches[settings.JOB_CACHE_ALIAS]
+
+
+def progress_key(job_id):
+    return f"upload-job:{job_id}:rows"
+
+
+def heartbeat(job_id, rows):
+    """Publish a job's progress; the entry expires once its worker stops refreshing it."""
+    job_cache().set(progress_key(job_id), rows, timeout=settings.UPLOAD_JOB_STALE_AFTER)
+
+
+def rows_processed(job):
+    """Rows written so far; live progress is published through the job cache while a job runs.
+
+    The ingest runs in one transaction, so the job row itself can't show it.
+    """
+    if job.state == UploadJob.RUNNING:
+        return job_cache().get(progress_key(job.pk), job.rows_processed)
+    return job.rows_processed
+
+
+def fail_if_stale(job):
+    """Mark a queued or running job failed once its worker has stopped sending heartbeats.
+
+    Jobs live in an in-process pool, so a restarted or recycled worker
+    process takes its queue with it.
+    """
+    if job.state not in (UploadJob.QUEUED, UploadJob.RUNNING):
+        return job
+    stale_before = timezone.now() - datetime.timedelta(seconds=settings.UPLOAD_JOB_STALE_AFTER)
+    if job.updated_at >= stale_before or job_cache().get(progress_key(job.pk)) is not None:
+        return job
+    # Conditional, so a job that has just moved on is left alone
+    UploadJob.objects.filter(pk=job.pk, state=job.state, updated_at=job.updated_at).update(
+        state=UploadJob.FAILED,
+        error="Upload job was lost: the server restarted before it finished. Please upload the file again.",
+        updated_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    return job
+
+
+def enqueue(job):
+    heartbeat(job.pk, 0)
+    # Only hand the job to a worker once its row is visible to other connections
+    transaction.on_commit(lambda: get_executor().submit(_run_in_worker, job.pk))
+
+
+def _run_in_worker(job_id):
+    try:
+        if run_job(job_id).state == UploadJob.SUCCEEDED and settings.RETENTION_PRUNE_AFTER_UPLOAD:
+            prune_after_upload()
+    finally:
+        # Worker threads own their connections; don't leave them open between jobs
+        connections.close_all()
+
+
+def run_job(job_id):
+    # Claim the job, unless it waited so long it was already given up on
+    claimed = UploadJob.objects.filter(pk=job_id, state=UploadJob.QUEUED).update(
+        state=UploadJob.RUNNING, updated_at=timezone.now(),
+    )
+    job = UploadJob.objects.get(pk=job_id)
+    if not claimed:
+        return job
+    heartbeat(job.pk, 0)
+
+    def report(rows):
+        heartbeat(job.pk, rows)
+
+    try:
+        with transaction.atomic():
+            dataset = Dataset.objects.create(filename=job.filename)
+            with job.file.open('rb') as file:
+                result = ingest_csv(dataset, file, progress=report)
+        job.state = UploadJob.SUCCEEDED
+        job.dataset = dataset
+        job.rows_processed = result.rows
+        response_cache.invalidate(dataset.pk)
+    except SchemaError as e:
+        job.state = UploadJob.FAILED
+        job.error = str(e)
+    except Exception as e:
+        logger.exception("Upload job %s failed", job.pk)
+        job.state = UploadJob.FAILED
+        job.error = f"CSV Processing Error: {str(e)}"
+    finally:
+        job_cache().delete(progress_key(job.pk))
+        job.file.delete(save=False)
+        job.save()
+    return job
+
+
+def prune_after_upload():
+    # The upload already succeeded; a failed prune is retried after the next one
+    try:
+        retention.prune()
+    except Exception:
+        logger.exception("Dataset retention failed")
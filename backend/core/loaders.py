@@ -0,0 +1,109 @@
+import io
+from itertools import islice, repeat
+
+from django.conf import settings
+from django.db import connection
+import pandas as pd
+
+from .models import Equipment
+
+# Equipment field -> normalized CSV column
+COLUMN_MAP = {
+    'equipment_name': 'Equipment Name',
+    'equipment_type': 'Type',
+    'flowrate': 'Flowrate',
+    'pressure': 'Pressure',
+    'temperature': 'Temperature',
+}
+NUMERIC_FIELDS = ('flowrate', 'pressure', 'temperature')
+
+
+def insert_fields():
+    """Concrete Equipment fields written on ingest, in column order."""
+    return [f for f in Equipment._meta.concrete_fields if not f.primary_key]
+
+
+def equipment_columns(dataset, df):
+    """Convert a normalized frame into one list of DB values per insert field.
+
+    Each column is converted by NumPy/pandas in a single call, so no per-row
+    Series or model instance is ever built.
+    """
+    columns = []
+    for field in insert_fields():
+        if field.attname == 'dataset_id':
+            columns.append(repeat(field.get_db_prep_save(dataset.pk, connection), len(df)))
+        elif field.attname in NUMERIC_FIELDS:
+            columns.append(df[COLUMN_MAP[field.attname]].to_numpy(dtype='float64').tolist())
+        else:
+            columns.append(df[COLUMN_MAP[field.attname]].astype(str).tolist())
+    return columns
+
+
+def equipment_rows(dataset, df):
+    """INSERT parameter tuples for every row of a normalized frame."""
+    return zip(*equipment_columns(dataset, df))
+
+
+class InsertLoader:
+    """Portable loader: parameter tuples sent with executemany in fixed-size batches."""
+    name = 'insert'
+
+    def load(self, dataset, df, batch_size):
+        fields = insert_fields()
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(Equipment._meta.db_table),
+            ', '.join(quote(f.column) for f in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        rows = equipment_rows(dataset, df)
+        with connection.cursor() as cursor:
+            while batch := list(islice(rows, batch_size)):
+                cursor.executemany(sql, batch)
+
+
+class CopyLoader:
+    """PostgreSQL loader: the frame is rendered to CSV in memory and sent with COPY FROM STDIN."""
+    name = 'copy'
+
+    def load(self, dataset, df, batch_size=None):
+        fields = insert_fields()
+        frame = pd.DataFrame(index=df.index)
+        for field in fields:
+            if field.attname == 'dataset_id':
+                frame[field.column] = str(dataset.pk)
+            elif field.attname in NUMERIC_FIELDS:
+                frame[field.column] = df[COLUMN_MAP[field.attname]].astype('float64')
+            else:
+                frame[field.column] = df[COLUMN_MAP[field.attname]].astype(str)
+        buffer = io.StringIO()
+        # NaN is written literally so COPY stores what an INSERT of the same value would
+        frame.to_csv(buffer, header=False, index=False, na_rep='NaN')
+        buffer.seek(0)
+
+        quote = connection.ops.quote_name
+        sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            quote(Equipment._meta.db_table),
+            ', '.join(quote(f.column) for f in fields),
+        )
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+
+LOADERS = {loader.name: loader for loader in (InsertLoader, CopyLoader)}
+
+
+def get_loader(name=None):
+    """Loader for the configured backend; ``auto`` picks COPY on PostgreSQL."""
+    name = name or settings.INGEST_LOADER
+    if name == 'auto':
+        name = 'copy' if connection.vendor == 'postgresql' else 'insert'
+    if name == 'copy' and connection.vendor != 'postgresql':
+        raise ValueError("The COPY loader requires PostgreSQL")
+    return LOADERS[name]()
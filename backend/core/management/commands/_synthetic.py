@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+EQUIPMENT_TYPES = ['Reactor', 'Pump', 'Heat Exchanger', 'Compressor', 'Valve', 'Condenser']
+
+
+def synthetic_frame(rows, seed=0):
+    """Normalized frame shaped like a plant export, for benchmarks."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Equipment Name': [f"EQ-{i:07d}" for i in range(rows)],
+        'Type': rng.choice(EQUIPMENT_TYPES, size=rows),
+        'Flowrate': rng.normal(120.0, 30.0, size=rows).round(2),
+        'Pressure': rng.normal(6.0, 1.5, size=rows).round(2),
+        'Temperature': rng.normal(110.0, 25.0, size=rows).round(2),
+    })
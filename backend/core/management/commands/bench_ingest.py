@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.ingest import ingest_frame
+from core.loaders import equipment_rows
+from core.models import Dataset, Equipment
+from ._synthetic import synthetic_frame
+
+
+def build_equipment_iterrows(dataset, df):
+    # The original per-row path from UploadView, kept for comparison
+    return [
+        Equipment(
+            dataset=dataset,
+            equipment_name=row['Equipment Name'],
+            equipment_type=row['Type'],
+            flowrate=row['Flowrate'],
+            pressure=row['Pressure'],
+            temperature=row['Temperature'],
+        )
+        for _, row in df.iterrows()
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare the legacy iterrows ingest with the columnar engine on a synthetic dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        df = synthetic_frame(rows)
+        self.stdout.write(f"Benchmarking ingest of {rows} rows")
+
+        with transaction.atomic():
+            dataset = Dataset.objects.create(filename='bench.csv')
+
+            started = time.perf_counter()
+            build_equipment_iterrows(dataset, df)
+            legacy = time.perf_counter() - started
+
+            started = time.perf_counter()
+            list(equipment_rows(dataset, df))
+            columnar = time.perf_counter() - started
+
+            self.report("iterrows build", rows, legacy)
+            self.report("columnar build", rows, columnar)
+            self.stdout.write(f"  speedup: {legacy / columnar:.1f}x")
+
+            started = time.perf_counter()
+            Equipment.objects.bulk_create(build_equipment_iterrows(dataset, df))
+            legacy = time.perf_counter() - started
+            Equipment.objects.filter(dataset=dataset).delete()
+
+            result = ingest_frame(dataset, df, batch_size=options['batch_size'])
+            self.report("iterrows end-to-end", rows, legacy)
+            self.report("columnar end-to-end", rows, result.seconds)
+            self.stdout.write(f"  speedup: {legacy / result.seconds:.1f}x")
+
+            # Leave the database as we found it
+            transaction.set_rollback(True)
+
+    def report(self, label, rows, seconds):
+        self.stdout.write(f"  {label:<22} {seconds:8.3f}s  {rows / seconds:12,.0f} rows/s")
@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.loaders import LOADERS, equipment_rows, insert_fields
+from core.models import Dataset, Equipment
+from ._synthetic import synthetic_frame
+
+
+class BulkCreateLoader:
+    # Django's multi-row INSERT path, kept for comparison
+    name = 'bulk_create'
+
+    def load(self, dataset, df, batch_size):
+        attnames = [f.attname for f in insert_fields()]
+        Equipment.objects.bulk_create(
+            (Equipment(**dict(zip(attnames, row))) for row in equipment_rows(dataset, df)),
+            batch_size=batch_size,
+        )
+
+
+class Command(BaseCommand):
+    help = "Compare Equipment loaders (COPY, batched INSERT, bulk_create) on a synthetic dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        chunk_size = options['chunk_size'] or settings.INGEST_CHUNK_SIZE
+        batch_size = options['batch_size'] or settings.INGEST_BATCH_SIZE
+        df = synthetic_frame(rows)
+
+        loaders = [BulkCreateLoader(), LOADERS['insert']()]
+        if connection.vendor == 'postgresql':
+            loaders.append(LOADERS['copy']())
+        else:
+            self.stdout.write("COPY loader skipped: the default database is not PostgreSQL")
+
+        self.stdout.write(f"Loading {rows} rows on {connection.vendor} in chunks of {chunk_size}")
+        for loader in loaders:
+            with transaction.atomic():
+                dataset = Dataset.objects.create(filename='bench.csv')
+                started = time.perf_counter()
+                for start in range(0, rows, chunk_size):
+                    loader.load(dataset, df.iloc[start:start + chunk_size], batch_size)
+                seconds = time.perf_counter() - started
+                # Leave the database as we found it
+                transaction.set_rollback(True)
+            self.stdout.write(f"  {loader.name:<12} {seconds:8.2f}s  {rows / seconds:12,.0f} rows/s")
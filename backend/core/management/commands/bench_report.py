@@ -0,0 +1,75 @@
+import io
+import resource
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import reports, retention
+from core.ingest import ingest_frame
+from core.models import Dataset
+from ._synthetic import synthetic_frame
+
+
+def build_eager(dataset):
+    # The original delivery: every flowable in a list, the PDF in a BytesIO
+    buffer = io.BytesIO()
+    reports.build_report(dataset, buffer, lazy=False)
+    return buffer.getvalue()
+
+
+def build_lazy(dataset):
+    # Flowables generated as ReportLab consumes them, the PDF in a spooled file
+    reports.stream_report(dataset).close()
+
+
+MODES = {'eager': build_eager, 'lazy': build_lazy}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Command(BaseCommand):
+    help = "Compare peak RSS of eager and lazy/spooled PDF report builds, each in a fresh process."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        # Internal: measure a single build of an existing dataset in this process
+        parser.add_argument('--dataset', help="Measure one build of this dataset id in-process.")
+        parser.add_argument('--mode', choices=sorted(MODES), default='lazy')
+
+    def handle(self, *args, **options):
+        if options['dataset']:
+            return self.measure(options['dataset'], options['mode'])
+
+        rows = options['rows']
+        dataset = Dataset.objects.create(filename='bench.csv', total_records=rows)
+        try:
+            ingest_frame(dataset, synthetic_frame(rows))
+            self.stdout.write(f"Benchmarking a {rows}-row report (peak RSS of a fresh process per mode)")
+            for mode in ('eager', 'lazy'):
+                output = subprocess.run(
+                    [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_report',
+                     '--dataset', str(dataset.pk), '--mode', mode],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                baseline, peak, seconds = (float(v) for v in output.split())
+                self.stdout.write(
+                    f"  {mode:<6} peak {peak:8.1f} MB  (+{peak - baseline:.1f} MB over baseline)  {seconds:7.2f}s"
+                )
+        finally:
+            # Leave the database as we found it
+            retention.delete_datasets([dataset.pk])
+
+    def measure(self, dataset_id, mode):
+        dataset = Dataset.objects.get(pk=dataset_id)
+        baseline = peak_rss_mb()
+        started = time.perf_counter()
+        MODES[mode](dataset)
+        seconds = time.perf_counter() - started
+        self.stdout.write(f"{baseline} {peak_rss_mb()} {seconds}")
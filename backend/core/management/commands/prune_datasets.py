@@ -0,0 +1,30 @@
+from dataclasses import replace
+
+from django.core.management.base import BaseCommand
+
+from core import retention
+
+
+class Command(BaseCommand):
+    help = "Delete datasets outside the retention policy (RETENTION_* settings, overridable here)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-latest', type=int, default=None)
+        parser.add_argument('--max-age-days', type=int, default=None)
+        parser.add_argument('--max-rows', type=int, default=None)
+        parser.add_argument('--dry-run', action='store_true', help="List the expired datasets without deleting them.")
+
+    def handle(self, *args, **options):
+        overrides = {
+            name: options[name] for name in ('keep_latest', 'max_age_days', 'max_rows')
+            if options[name] is not None
+        }
+        policy = replace(retention.RetentionPolicy.from_settings(), **overrides)
+        result = retention.prune(policy, dry_run=options['dry_run'])
+
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(f"{verb} {len(result.dataset_ids)} datasets")
+        for dataset_id in result.dataset_ids:
+            self.stdout.write(f"  {dataset_id}")
+        for label, count in result.deleted.items():
+            self.stdout.write(f"  {label}: {count} rows")
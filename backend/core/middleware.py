@@ -0,0 +1,16 @@
+from django.middleware.gzip import GZipMiddleware
+
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware for JSON bodies only.
+
+    Streaming responses pass through untouched: file reports keep their
+    Content-Length and the server's sendfile path, and the ZIP, npz and
+    export streams are already compressed or are downloads clients track
+    byte by byte.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or not response.get('Content-Type', '').startswith('application/json'):
+            return response
+        return super().process_response(request, response)
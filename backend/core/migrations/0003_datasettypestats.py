@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, Sum
+
+METRICS = ('flowrate', 'pressure', 'temperature')
+
+
+def backfill_type_stats(apps, schema_editor):
+    Dataset = apps.get_model('core', 'Dataset')
+    Equipment = apps.get_model('core', 'Equipment')
+    DatasetTypeStats = apps.get_model('core', 'DatasetTypeStats')
+
+    aggregates = {'count': Count('id')}
+    for metric in METRICS:
+        aggregates[f'{metric}_sum'] = Sum(metric)
+        aggregates[f'{metric}_sumsq'] = Sum(F(metric) * F(metric))
+        aggregates[f'{metric}_min'] = Min(metric)
+        aggregates[f'{metric}_max'] = Max(metric)
+
+    for dataset_id in Dataset.objects.values_list('id', flat=True):
+        rows = Equipment.objects.filter(dataset_id=dataset_id).values('equipment_type').annotate(**aggregates)
+        DatasetTypeStats.objects.bulk_create(
+            DatasetTypeStats(dataset_id=dataset_id, **row) for row in rows
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_uploadjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetTypeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_type', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('flowrate_sum', models.FloatField(default=0.0)),
+                ('flowrate_sumsq', models.FloatField(default=0.0)),
+                ('flowrate_min', models.FloatField(null=True)),
+                ('flowrate_max', models.FloatField(null=True)),
+                ('pressure_sum', models.FloatField(default=0.0)),
+                ('pressure_sumsq', models.FloatField(default=0.0)),
+                ('pressure_min', models.FloatField(null=True)),
+                ('pressure_max', models.FloatField(null=True)),
+                ('temperature_sum', models.FloatField(default=0.0)),
+                ('temperature_sumsq', models.FloatField(default=0.0)),
+                ('temperature_min', models.FloatField(null=True)),
+                ('temperature_max', models.FloatField(null=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='type_stats', to='core.dataset')),
+            ],
+            options={
+                'ordering': ['equipment_type'],
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'equipment_type'), name='unique_dataset_type_stats')],
+            },
+        ),
+        migrations.RunPython(backfill_type_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_datasettypestats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['-upload_date'], name='dataset_upload_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['dataset', 'equipment_type'], include=('flowrate', 'pressure', 'temperature'), name='equipment_dataset_type_idx'),
+        ),
+        # Dropped only once the composite index covers dataset_id lookups
+        migrations.AlterField(
+            model_name='equipment',
+            name='dataset',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='equipment', to='core.dataset'),
+        ),
+    ]
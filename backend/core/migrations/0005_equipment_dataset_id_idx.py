@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['dataset', 'id'], name='equipment_dataset_id_idx'),
+        ),
+    ]
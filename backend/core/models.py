@@ -14,17 +14,113 @@ class Dataset(models.Model):
 
     class Meta:
         ordering = ['-upload_date']
+        indexes = [
+            # Latest-dataset lookups and the retention scan walk this in order
+            models.Index(fields=['-upload_date'], name='dataset_upload_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.filename} ({self.upload_date.strftime('%Y-%m-%d %H:%M')})"
 
 class Equipment(models.Model):
-    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='equipment')
+    # Indexed through equipment_dataset_id_idx and equipment_dataset_type_idx, both led by dataset_id
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='equipment', db_index=False)
     equipment_name = models.CharField(max_length=255)
     equipment_type = models.CharField(max_length=100)  # "Type" in CSV
     flowrate = models.FloatField()
     pressure = models.FloatField()
     temperature = models.FloatField()
 
+    class Meta:
+        indexes = [
+            # Per-type scans of a dataset; the metrics are covered on backends
+            # with INCLUDE support (PostgreSQL) so they can be index-only
+            models.Index(
+                fields=['dataset', 'equipment_type'],
+                include=['flowrate', 'pressure', 'temperature'],
+                name='equipment_dataset_type_idx',
+            ),
+            # One dataset's rows in id order: exports, column scans, keyset
+            # pages and report logs read them without sorting the dataset
+            models.Index(fields=['dataset', 'id'], name='equipment_dataset_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.equipment_name} ({self.equipment_type})"
+
+class DatasetTypeStats(models.Model):
+    # Per equipment type aggregates, accumulated while the dataset is ingested
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='type_stats')
+    equipment_type = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    flowrate_sum = models.FloatField(default=0.0)
+    flowrate_sumsq = models.FloatField(default=0.0)
+    flowrate_min = models.FloatField(null=True)
+    flowrate_max = models.FloatField(null=True)
+
+    pressure_sum = models.FloatField(default=0.0)
+    pressure_sumsq = models.FloatField(default=0.0)
+    pressure_min = models.FloatField(null=True)
+    pressure_max = models.FloatField(null=True)
+
+    temperature_sum = models.FloatField(default=0.0)
+    temperature_sumsq = models.FloatField(default=0.0)
+    temperature_min = models.FloatField(null=True)
+    temperature_max = models.FloatField(null=True)
+
+    class Meta:
+        ordering = ['equipment_type']
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'equipment_type'], name='unique_dataset_type_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.equipment_type} x{self.count}"
+
+    def mean(self, field):
+        return getattr(self, f'{field}_sum') / self.count if self.count else 0.0
+
+    def std(self, field):
+        if not self.count:
+            return 0.0
+        variance = getattr(self, f'{field}_sumsq') / self.count - self.mean(field) ** 2
+        return max(variance, 0.0) ** 0.5
+
+    def as_distribution(self):
+        # Same shape as the GROUP BY rows SummaryView used to compute
+        return {
+            'equipment_type': self.equipment_type,
+            'count': self.count,
+            'avg_flow': self.mean('flowrate'),
+            'avg_press': self.mean('pressure'),
+            'avg_temp': self.mean('temperature'),
+        }
+
+class UploadJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    file = models.FileField(upload_to='uploads/', blank=True)  # Removed once ingested
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=QUEUED)
+    rows_processed = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    dataset = models.ForeignKey(Dataset, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} [{self.state}]"
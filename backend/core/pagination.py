@@ -0,0 +1,10 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class EquipmentCursorPagination(CursorPagination):
+    # Keyset pagination on the primary key: each page is "id > last seen id"
+    ordering = 'id'
+    page_size = settings.EQUIPMENT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.EQUIPMENT_MAX_PAGE_SIZE
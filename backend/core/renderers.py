@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from itertools import islice
+
+import numpy as np
+from rest_framework.renderers import BaseRenderer
+
+
+class NpzRenderer(BaseRenderer):
+    """NumPy ``.npz`` archive of named columns; load with ``np.load(BytesIO(body))``."""
+    media_type = 'application/x-npz'
+    format = 'npz'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict) or not all(isinstance(v, np.ndarray) for v in data.values()):
+            # Error payloads (404s and the like) have no columnar form
+            return json.dumps(data, default=str).encode()
+        buffer = io.BytesIO()
+        np.savez(buffer, **data)
+        return buffer.getvalue()
+
+
+class StreamingRenderer(BaseRenderer):
+    """Renderer whose body is produced by ``stream()`` for a StreamingHttpResponse.
+
+    ``render()`` only handles the small payloads DRF renders itself, such as
+    error responses.
+    """
+    rows_per_write = 1000
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, default=str).encode()
+
+    def stream(self, columns, rows):
+        """Yield encoded chunks: a header right away, then ``rows_per_write`` rows at a time."""
+        header = self.header(columns)
+        if header:
+            yield header
+        while batch := list(islice(rows, self.rows_per_write)):
+            yield self.encode_rows(columns, batch)
+
+    def header(self, columns):
+        return b''
+
+    def encode_rows(self, columns, rows):
+        raise NotImplementedError
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def header(self, columns):
+        return self.encode_rows(columns, [columns])
+
+    def encode_rows(self, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def encode_rows(self, columns, rows):
+        return ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in rows).encode(self.charset)
@@ -0,0 +1,25 @@
+"""Entry points for batch report worker processes.
+
+Spawned workers unpickle these functions by importing this module before
+Django is set up, so it must not import models (or anything that does) at
+module level.
+"""
+import os
+
+
+def init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+
+def render_claimed(dataset_id):
+    from . import reports
+    reports.render_claimed(dataset_id)
+
+
+def render(dataset_id):
+    from . import reports
+    from .models import Dataset
+    dataset = Dataset.objects.get(pk=dataset_id)
+    return reports.cached_report(dataset) or reports.render(dataset)
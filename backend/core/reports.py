@@ -0,0 +1,403 @@
+"""PDF reports: the ReportLab builder and an on-disk cache of rendered reports.
+
+A dataset never changes after upload, so its report is rendered once in the
+render process pool (shared with batch downloads) and kept under
+``MEDIA_ROOT/reports``. Which reports are rendering and which failed is kept
+in the shared job cache, so every web worker process sees the same state. The directory is
+bounded by ``REPORT_CACHE_MAX_BYTES``; serving a report touches its mtime and
+eviction drops the least recently used files first.
+"""
+import datetime
+import logging
+import os
+import tempfile
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+
+from . import charts
+from .columnar import METRICS, ordered_rows
+from .models import Dataset
+
+logger = logging.getLogger(__name__)
+
+# Bump when the report layout changes so stale cached files are never served
+REPORT_VERSION = 3
+
+DETAIL_HEADER = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temp']
+DETAIL_COL_WIDTHS = [2.2*inch, 1.4*inch, 0.8*inch, 0.8*inch, 0.8*inch]
+DETAIL_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#0ea5e9")),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+    ('TOPPADDING', (0, 0), (-1, 0), 10),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8fafc")]),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor("#334155")),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.1, colors.HexColor("#cbd5e1")),
+    ('ALIGN', (2, 0), (-1, -1), 'CENTER'),
+])
+TYPE_SUMMARY_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f1f5f9")),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor("#0ea5e9")),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor("#334155")),
+    ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#e2e8f0")),
+    ('PADDING', (0, 0), (-1, -1), 8),
+])
+METRIC_LABELS = {'flowrate': 'Flowrate (L/m)', 'pressure': 'Pressure (PSI)', 'temperature': 'Temperature (°C)'}
+
+def build_report(dataset, file, max_detail_rows=None, chunk_rows=None, lazy=True):
+    """Render the PDF report of a dataset into a binary file object.
+
+    ``max_detail_rows`` (default ``REPORT_MAX_DETAIL_ROWS``) caps the detailed
+    log; a capped report ends with per-type summary pages instead. With
+    ``lazy`` the flowables are generated as ReportLab consumes them, so only
+    the tables of the page being laid out are alive at once.
+    """
+    doc = SimpleDocTemplate(file, pagesize=letter, rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=50)
+    flowables = report_flowables(dataset, max_detail_rows, chunk_rows)
+    doc.build(LazyFlowables(flowables) if lazy else list(flowables))
+
+
+def report_flowables(dataset, max_detail_rows=None, chunk_rows=None):
+    """Generate the report's flowables in document order."""
+    styles = getSampleStyleSheet()
+
+    # Custom Styles
+    title_style = ParagraphStyle(
+        'ReportTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor("#0ea5e9"), # Primary Blue
+        spaceAfter=12,
+        fontName="Helvetica-Bold"
+    )
+    subtitle_style = ParagraphStyle(
+        'ReportSubtitle',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor("#64748b"), # Gray 500
+        spaceAfter=24,
+    )
+    section_header_style = ParagraphStyle(
+        'SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor("#334155"), # Slate 800
+        spaceBefore=20,
+        spaceAfter=10,
+        fontName="Helvetica-Bold"
+    )
+
+    # 1. Header Section
+    yield Paragraph("ChemVisualizer Analytics Report", title_style)
+    yield Paragraph(f"Dataset: {dataset.filename}", subtitle_style)
+    yield Paragraph(f"Generated on {datetime.datetime.now().strftime('%B %d, %Y at %H:%M')}", subtitle_style)
+    yield Spacer(1, 0.2 * inch)
+
+    # 2. Executive Summary (Card-like table)
+    yield Paragraph("Executive Summary", section_header_style)
+    summary_data = [
+        [Paragraph("<b>Total Records</b>", styles['Normal']), Paragraph("<b>Avg Flowrate</b>", styles['Normal']), Paragraph("<b>Avg Pressure</b>", styles['Normal']), Paragraph("<b>Avg Temp</b>", styles['Normal'])],
+        [f"{dataset.total_records}", f"{dataset.avg_flowrate:.1f} L/m", f"{dataset.avg_pressure:.1f} PSI", f"{dataset.avg_temperature:.1f} °C"]
+    ]
+    summary_table = Table(summary_data, colWidths=[1.5*inch]*4)
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f1f5f9")),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor("#0ea5e9")),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#e2e8f0")),
+        ('PADDING', (0, 0), (-1, -1), 12),
+        ('FONTSIZE', (0, 1), (-1, 1), 14),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ]))
+    yield summary_table
+    yield Spacer(1, 0.4 * inch)
+
+    # 3. Charts, drawn once per dataset and reused from the chart cache
+    yield Paragraph("Charts", section_header_style)
+    width, height = charts.SIZE
+    for name in charts.CHARTS:
+        yield Image(charts.chart_png(dataset, name), width=6.5*inch, height=6.5*inch * height / width)
+        yield Spacer(1, 0.2 * inch)
+
+    # 4. Equipment Detailed Logs
+    yield Paragraph("Detailed Equipment Logs", section_header_style)
+    if max_detail_rows is None:
+        max_detail_rows = settings.REPORT_MAX_DETAIL_ROWS
+    capped = max_detail_rows is not None and dataset.total_records > max_detail_rows
+    if capped:
+        yield Paragraph(
+            f"Showing the first {max_detail_rows:,} of {dataset.total_records:,} records; "
+            "per-type summaries follow.", subtitle_style)
+
+    rows = (ordered_rows(dataset, ('equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature'))
+            .iterator(chunk_size=settings.REPORT_TABLE_CHUNK_ROWS))
+    if capped:
+        rows = islice(rows, max_detail_rows)
+    yield from detail_tables(rows, chunk_rows)
+
+    # 5. Per-type summaries stand in for the rows left out of a capped log
+    if capped:
+        yield from type_summary_pages(dataset, section_header_style)
+
+
+def detail_tables(rows, chunk_rows=None):
+    """Yield the detailed log as fixed-size tables that each repeat the header.
+
+    ReportLab measures every row of a Table before it can split it across
+    pages, so one table per chunk keeps layout cost linear in the row count.
+    """
+    chunk_rows = chunk_rows or settings.REPORT_TABLE_CHUNK_ROWS
+    while chunk := list(islice(rows, chunk_rows)):
+        data = [DETAIL_HEADER]
+        data.extend(
+            [name, equipment_type, f"{flowrate:.1f}", f"{pressure:.1f}", f"{temperature:.1f}"]
+            for name, equipment_type, flowrate, pressure, temperature in chunk
+        )
+        table = Table(data, hAlign='LEFT', colWidths=DETAIL_COL_WIDTHS, repeatRows=1)
+        table.setStyle(DETAIL_STYLE)
+        yield table
+
+
+def type_summary_pages(dataset, header_style):
+    """One page per equipment type with its precomputed statistics."""
+    for stats in dataset.type_stats.all():
+        yield PageBreak()
+        yield Paragraph(f"{stats.equipment_type} Summary ({stats.count:,} records)", header_style)
+        data = [['Metric', 'Mean', 'Std Dev', 'Min', 'Max']]
+        for metric in METRICS:
+            low, high = getattr(stats, f'{metric}_min'), getattr(stats, f'{metric}_max')
+            data.append([
+                METRIC_LABELS[metric],
+                f"{stats.mean(metric):.2f}",
+                f"{stats.std(metric):.2f}",
+                f"{low:.2f}" if low is not None else "-",
+                f"{high:.2f}" if high is not None else "-",
+            ])
+        table = Table(data, hAlign='LEFT', colWidths=[1.8*inch, 1.1*inch, 1.1*inch, 1.1*inch, 1.1*inch])
+        table.setStyle(TYPE_SUMMARY_STYLE)
+        yield table
+
+
+class LazyFlowables:
+    """The list protocol ``doc.build`` uses, over a generator of flowables.
+
+    ReportLab pops flowables off the front and pushes split remainders back
+    there, so only a short prefix is ever materialized. ``len`` is a lower
+    bound (ReportLab only tests it for emptiness and progress reporting).
+    """
+
+    def __init__(self, source):
+        self._head = []
+        self._source = iter(source)
+        self._exhausted = False
+
+    def _fill(self, count=None):
+        while not self._exhausted and (count is None or len(self._head) < count):
+            try:
+                self._head.append(next(self._source))
+            except StopIteration:
+                self._exhausted = True
+
+    def _fill_for(self, key):
+        if isinstance(key, slice):
+            self._fill(None if key.stop is None or key.stop < 0 else key.stop)
+        else:
+            self._fill(None if key < 0 else key + 1)
+
+    def __len__(self):
+        self._fill(1)
+        return len(self._head) + (0 if self._exhausted else 1)
+
+    def __iter__(self):
+        self._fill()
+        return iter(self._head)
+
+    def __getitem__(self, key):
+        self._fill_for(key)
+        return self._head[key]
+
+    def __setitem__(self, key, value):
+        self._fill_for(key)
+        self._head[key] = value
+
+    def __delitem__(self, key):
+        self._fill_for(key)
+        del self._head[key]
+
+    def insert(self, index, value):
+        self._fill(index)
+        self._head.insert(index, value)
+
+
+def stream_report(dataset):
+    """Render a report into a spooled temporary file, rewound for streaming.
+
+    Small reports stay in memory; past ``REPORT_SPOOL_MAX_BYTES`` the file
+    rolls over to disk.
+    """
+    file = tempfile.SpooledTemporaryFile(max_size=settings.REPORT_SPOOL_MAX_BYTES)
+    try:
+        build_report(dataset, file)
+    except BaseException:
+        file.close()
+        raise
+    file.seek(0)
+    return file
+
+
+def report_dir():
+    return os.path.join(settings.MEDIA_ROOT, 'reports')
+
+
+def report_path(dataset_id, upload_date):
+    # The upload date keeps a report from outliving a dataset id reused by a restore;
+    # the layout settings are part of the name so changing them re-renders
+    layout = f"v{REPORT_VERSION}-{settings.REPORT_MAX_DETAIL_ROWS or 'all'}-{settings.REPORT_CHART_POINTS}"
+    return os.path.join(report_dir(), f"{dataset_id}-{int(upload_date.timestamp())}-{layout}.pdf")
+
+
+def cached_report(dataset):
+    """Path of the dataset's rendered report, or None if it has not been rendered yet."""
+    path = report_path(dataset.pk, dataset.upload_date)
+    try:
+        # Mark as recently used for eviction
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def _state():
+    return caches[settings.JOB_CACHE_ALIAS]
+
+
+def _claim_key(dataset_id):
+    return f"report:{dataset_id}:rendering"
+
+
+def _failure_key(dataset_id):
+    return f"report:{dataset_id}:failure"
+
+
+def rendering(dataset_id):
+    return _state().has_key(_claim_key(dataset_id))
+
+
+def record_failure(dataset_id, error):
+    _state().set(_failure_key(dataset_id), error, timeout=None)
+
+
+def pop_failure(dataset_id):
+    """Error of the last failed render, cleared so the next request retries."""
+    error = _state().get(_failure_key(dataset_id))
+    if error is not None:
+        _state().delete(_failure_key(dataset_id))
+    return error
+
+
+def release(dataset_id):
+    _state().delete(_claim_key(dataset_id))
+
+
+def schedule(dataset):
+    """Queue a render of the dataset's report unless some process has already claimed one.
+
+    The claim expires after REPORT_RENDER_TIMEOUT, in case its worker is
+    lost without releasing it.
+    """
+    if not _state().add(_claim_key(dataset.pk), True, timeout=settings.REPORT_RENDER_TIMEOUT):
+        return
+    # Imported here: batch imports this module
+    from . import batch, report_worker
+    try:
+        future = batch.submit(report_worker.render_claimed, dataset.pk)
+    except BaseException:
+        release(dataset.pk)
+        raise
+    future.add_done_callback(partial(_render_done, dataset.pk))
+
+
+def _render_done(dataset_id, future):
+    # render_claimed records its own errors; this catches a worker process that died
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Report render for %s was lost: %r", dataset_id, future.exception())
+        record_failure(dataset_id, str(future.exception()) or "render worker stopped")
+        release(dataset_id)
+
+
+def render_claimed(dataset_id):
+    """Render a claimed report, recording any failure, then release the claim."""
+    try:
+        render(Dataset.objects.get(pk=dataset_id))
+    except Exception as e:
+        logger.exception("Report render for %s failed", dataset_id)
+        record_failure(dataset_id, str(e))
+    finally:
+        # After the failure is recorded, so a poll never sees neither
+        release(dataset_id)
+
+
+def render(dataset):
+    """Render a dataset's report into the cache and return its path."""
+    path = report_path(dataset.pk, dataset.upload_date)
+    os.makedirs(report_dir(), exist_ok=True)
+    # Write beside the final path and rename, so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=report_dir(), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            build_report(dataset, file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    evict(keep=path)
+    return path
+
+
+def evict(max_bytes=None, keep=None):
+    """Delete least recently used reports until the cache fits in ``max_bytes``."""
+    max_bytes = settings.REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    with os.scandir(report_dir()) as it:
+        for entry in it:
+            if entry.name.endswith('.pdf'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def discard(dataset_id):
+    """Remove every cached report of a dataset."""
+    try:
+        with os.scandir(report_dir()) as it:
+            for entry in it:
+                if entry.name.startswith(f"{dataset_id}-"):
+                    os.unlink(entry.path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,92 @@
+"""Dataset retention: which datasets a policy expires, and set-based deletion of them.
+
+Expired datasets are removed with one DELETE (or UPDATE) per table. Equipment
+and DatasetTypeStats have no signals or reverse relations, so the delete
+collector fast-deletes them by ``dataset_id`` without loading their rows;
+keep it that way, or pruning large datasets pulls every row into Python.
+"""
+import datetime
+import logging
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import cache as response_cache
+from . import charts
+from . import reports
+from .models import Dataset
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Limits on the kept history; None disables a limit. The newest dataset is always kept."""
+    keep_latest: int | None = None
+    max_age_days: int | None = None
+    max_rows: int | None = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            keep_latest=settings.RETENTION_KEEP_LATEST,
+            max_age_days=settings.RETENTION_MAX_AGE_DAYS,
+            max_rows=settings.RETENTION_MAX_ROWS,
+        )
+
+
+@dataclass
+class PruneResult:
+    dataset_ids: list
+    deleted: dict = field(default_factory=dict)  # model label -> rows deleted
+
+
+def expired_ids(policy, now=None):
+    """Ids of the datasets the policy drops, newest first.
+
+    Datasets are walked newest first (on ``dataset_upload_date_idx``); the first
+    one that breaks a limit expires together with everything older than it.
+    """
+    cutoff = None
+    if policy.max_age_days is not None:
+        cutoff = (now or timezone.now()) - datetime.timedelta(days=policy.max_age_days)
+
+    rows = Dataset.objects.order_by('-upload_date').values_list('id', 'upload_date', 'total_records')
+    expired = []
+    kept_rows = 0
+    for position, (dataset_id, upload_date, records) in enumerate(rows.iterator()):
+        if expired or (position > 0 and (
+            (policy.keep_latest is not None and position >= policy.keep_latest)
+            or (cutoff is not None and upload_date < cutoff)
+            or (policy.max_rows is not None and kept_rows + records > policy.max_rows)
+        )):
+            expired.append(dataset_id)
+        else:
+            kept_rows += records
+    return expired
+
+
+def delete_datasets(dataset_ids):
+    """Delete datasets and their rows with one statement per table."""
+    if not dataset_ids:
+        return {}
+    # Cascades to Equipment and DatasetTypeStats; UploadJob.dataset is SET_NULL
+    _, deleted = Dataset.objects.filter(id__in=dataset_ids).delete()
+    for dataset_id in dataset_ids:
+        response_cache.invalidate(dataset_id)
+        reports.discard(dataset_id)
+        charts.discard(dataset_id)
+    return deleted
+
+
+def prune(policy=None, dry_run=False):
+    """Apply a retention policy (the configured one by default)."""
+    policy = policy or RetentionPolicy.from_settings()
+    dataset_ids = expired_ids(policy)
+    result = PruneResult(dataset_ids=dataset_ids)
+    if not dry_run:
+        result.deleted = delete_datasets(dataset_ids)
+        if dataset_ids:
+            logger.info("Pruned %d datasets: %s", len(dataset_ids), result.deleted)
+    return result
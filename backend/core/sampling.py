@@ -0,0 +1,153 @@
+"""Downsampling of a dataset's points for the dashboard scatter and density charts.
+
+The dashboard strategies work on the NumPy columns from ``columnar.fetch_columns``
+and are deterministic, so a sample can be cached and served under a stable ETag.
+"""
+import numpy as np
+from django.db.models import F, Window
+from django.db.models.functions import Mod, RowNumber
+
+from .columnar import fetch_columns
+
+STRATIFIED = 'stratified'
+GRID = 'grid'
+LTTB = 'lttb'
+STRATEGIES = (STRATIFIED, GRID, LTTB)
+
+SEED = 0
+
+
+def allocate(counts, n):
+    """Split ``n`` samples across strata in proportion to their sizes.
+
+    Shares are rounded by largest remainder; when ``n`` allows it, strata that
+    would get nothing take one sample from the largest quota so that every
+    equipment type stays visible.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    share = counts * n / counts.sum()
+    quota = np.floor(share).astype(np.int64)
+    leftover = n - int(quota.sum())
+    quota[np.argsort(quota - share, kind='stable')[:leftover]] += 1
+    if n >= len(counts):
+        for i in np.flatnonzero((quota == 0) & (counts > 0)):
+            quota[np.argmax(quota)] -= 1
+            quota[i] = 1
+    return np.minimum(quota, counts)
+
+
+def stratified_indices(type_codes, n, seed=SEED):
+    """Random sample without replacement, stratified by equipment type."""
+    if len(type_codes) <= n:
+        return np.arange(len(type_codes))
+    rng = np.random.default_rng(seed)
+    codes, counts = np.unique(type_codes, return_counts=True)
+    picked = [
+        rng.choice(np.flatnonzero(type_codes == code), size=quota, replace=False)
+        for code, quota in zip(codes, allocate(counts, n)) if quota
+    ]
+    return np.sort(np.concatenate(picked))
+
+
+def lttb_indices(x, y, n):
+    """Largest-Triangle-Three-Buckets decimation of y over x, keeping ``n`` points."""
+    size = len(x)
+    if n >= size:
+        return np.argsort(x, kind='stable')
+    if n < 3:
+        return np.argsort(x, kind='stable')[np.linspace(0, size - 1, n).astype(int)]
+
+    order = np.argsort(x, kind='stable')
+    xs, ys = x[order], y[order]
+    # n - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    selected = [0]
+    anchor = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = xs[end:edges[i + 2]].mean(), ys[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = xs[-1], ys[-1]
+        area = np.abs((xs[anchor] - next_x) * (ys[start:end] - ys[anchor])
+                      - (xs[anchor] - xs[start:end]) * (next_y - ys[anchor]))
+        anchor = start + int(np.argmax(area))
+        selected.append(anchor)
+    selected.append(size - 1)
+    return order[selected]
+
+
+def grid_points(columns, n, x='temperature', y='pressure'):
+    """Bin points on a 2D grid of at most ``n`` cells; one point per occupied cell."""
+    side = max(int(np.sqrt(n)), 1)
+    if not len(columns[x]):
+        return []
+    counts, x_edges, y_edges = np.histogram2d(columns[x], columns[y], bins=side)
+    flow, _, _ = np.histogram2d(columns[x], columns[y], bins=[x_edges, y_edges], weights=columns['flowrate'])
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    xi, yi = np.nonzero(counts)
+    return [
+        {x: float(x_centers[i]), y: float(y_centers[j]), 'flowrate': float(flow[i, j] / counts[i, j]), 'count': int(counts[i, j])}
+        for i, j in zip(xi, yi)
+    ]
+
+
+def density_grid(x, y, bins, window=None):
+    """2D histogram of ``y`` over ``x`` as ``(counts, x_edges, y_edges)``.
+
+    ``window`` is ``(x_min, x_max, y_min, y_max)``; any bound left as None
+    falls back to the data range. Points outside the window are dropped.
+    ``counts`` is in image order: one row per y bin, one column per x bin.
+    """
+    bounds = list(window or (None, None, None, None))
+    for i, values in ((0, x), (2, y)):
+        lo, hi = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+        bounds[i] = lo if bounds[i] is None else bounds[i]
+        bounds[i + 1] = hi if bounds[i + 1] is None else bounds[i + 1]
+        if bounds[i] == bounds[i + 1]:
+            # histogram2d needs a non-empty range
+            bounds[i] -= 0.5
+            bounds[i + 1] += 0.5
+    counts, x_edges, y_edges = np.histogram2d(
+        x, y, bins=bins, range=[bounds[0:2], bounds[2:4]],
+    )
+    return counts.T.astype(np.int64), x_edges, y_edges
+
+
+def sample_points(dataset, n, strategy=STRATIFIED):
+    """Representative scatter points of a dataset, at most ``n`` of them, in upload order."""
+    if strategy == GRID:
+        return grid_points(fetch_columns(dataset, with_types=False), n)
+    columns = fetch_columns(dataset, with_names=True)
+    if strategy == LTTB:
+        indices = lttb_indices(columns['temperature'], columns['pressure'], n)
+    else:
+        indices = stratified_indices(columns['type_codes'], n)
+    # Columns are in id order, so sorted positions give the rows in id order
+    indices = np.sort(indices)
+    fields = ('equipment_name', 'flowrate', 'pressure', 'temperature')
+    return [
+        dict(zip(fields, values))
+        for values in zip(*(columns[field][indices].tolist() for field in fields))
+    ]
+
+
+def strided_points(dataset, n, fields=('pressure', 'temperature')):
+    """Up to ``n`` rows at evenly spaced positions in upload order: a systematic sample.
+
+    Rows are numbered in the database (in equipment_dataset_id_idx order,
+    so without a sort) and only the sampled ones are returned, so no per-row
+    Python objects are built beyond the sample. Positions, not ids, are
+    spaced out, since concurrent uploads interleave their ids.
+    """
+    total = dataset.total_records
+    rows = dataset.equipment.order_by('id')
+    if n < total:
+        # Row p (from 0) is taken when p * (n - 1) / (total - 1) reaches a new
+        # integer: positions ceil(i * (total - 1) / (n - 1)), first and last included
+        rows = (rows
+                .alias(position=Window(RowNumber(), order_by=F('id').asc()))
+                .alias(offset=Mod((F('position') - 1) * max(n - 1, 1), total - 1))
+                .filter(offset__lt=max(n - 1, 1)))
+    return list(rows.values(*fields)[:max(n, 0)])
@@ -1,19 +1,28 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Dataset, Equipment
+from .models import Dataset, Equipment, UploadJob
+from .jobs import rows_processed
 
 class EquipmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Equipment
         fields = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
 
+    def __init__(self, *args, fields=None, **kwargs):
+        # Optional column projection, e.g. EquipmentSerializer(rows, many=True, fields=['id', 'pressure'])
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 class DatasetSerializer(serializers.ModelSerializer):
-    # Retrieve equipment details for detail view
-    equipment = EquipmentSerializer(many=True, read_only=True)
+    # Equipment rows are paged through their own endpoint
+    equipment_url = serializers.HyperlinkedIdentityField(view_name='dataset_equipment')
 
     class Meta:
         model = Dataset
-        fields = ['id', 'filename', 'upload_date', 'total_records', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'equipment']
-        read_only_fields = ['id', 'upload_date', 'total_records', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'equipment']
+        fields = ['id', 'filename', 'upload_date', 'total_records', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'equipment_url']
+        read_only_fields = ['id', 'upload_date', 'total_records', 'avg_flowrate', 'avg_pressure', 'avg_temperature']
 
 class DatasetListSerializer(serializers.ModelSerializer):
     # Simplified serializer for list view (no equipment details)
@@ -23,3 +32,20 @@ class DatasetListSerializer(serializers.ModelSerializer):
 
 class FileUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
+
+class BatchReportSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False,
+                                max_length=settings.REPORT_BATCH_MAX_IDS)
+    # 'pdf' reports and/or 'csv' exports of each dataset
+    formats = serializers.MultipleChoiceField(choices=['pdf', 'csv'], default=['pdf'])
+
+class UploadJobSerializer(serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='job_detail')
+    rows_processed = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadJob
+        fields = ['id', 'url', 'filename', 'state', 'rows_processed', 'error', 'dataset', 'created_at', 'updated_at']
+
+    def get_rows_processed(self, obj):
+        return rows_processed(obj)
@@ -1,3 +1,885 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import Future
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import async_views
+from . import batch
+from . import cache as response_cache
+from . import charts
+from . import columnar
+from . import jobs
+from . import report_worker
+from . import reports
+from . import retention
+from . import sampling
+from .loaders import COLUMN_MAP, CopyLoader, InsertLoader, get_loader
+from .models import Dataset, DatasetTypeStats, Equipment, UploadJob
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+SAMPLE_CSV = (
+    "Equipment_Name,Type,Flowrate (L/m),Pressure (PSI),Temperature (C)\n"
+    "Pump-1,Pump,10,2,30\n"
+    "Pump-2,Pump,20,4,50\n"
+    "Reactor-1,Reactor,30,6,70\n"
+)
+
+
+def csv_upload(content=SAMPLE_CSV, name='sample.csv'):
+    return SimpleUploadedFile(name, content.encode(), content_type='text/csv')
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class UploadViewTests(TestCase):
+    def upload(self, content=SAMPLE_CSV):
+        # Jobs are handed to the worker pool on commit; run them inline instead
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('upload'), {'file': csv_upload(content)})
+        if response.status_code == 202:
+            self.assertEqual(len(callbacks), 1)
+            jobs.run_job(response.json()['id'])
+        return response
+
+    def test_upload_ingests_rows_and_stats(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+
+        dataset = Dataset.objects.get()
+        self.assertEqual(dataset.total_records, 3)
+        self.assertAlmostEqual(dataset.avg_flowrate, 20.0)
+        self.assertAlmostEqual(dataset.avg_pressure, 4.0)
+        self.assertAlmostEqual(dataset.avg_temperature, 50.0)
+        self.assertEqual(
+            list(Equipment.objects.order_by('id').values_list('equipment_name', 'equipment_type', 'flowrate')),
+            [('Pump-1', 'Pump', 10.0), ('Pump-2', 'Pump', 20.0), ('Reactor-1', 'Reactor', 30.0)],
+        )
+
+    def test_upload_rejects_missing_columns(self):
+        response = self.upload("Name,Type\nA,Pump\n")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Missing columns', response.json()['error'])
+        self.assertFalse(UploadJob.objects.exists())
+        self.assertFalse(Dataset.objects.exists())
+
+    @override_settings(INGEST_CHUNK_SIZE=2, INGEST_BATCH_SIZE=1)
+    def test_upload_streams_in_chunks(self):
+        self.upload()
+
+        dataset = Dataset.objects.get()
+        self.assertEqual(dataset.total_records, 3)
+        self.assertEqual(dataset.equipment.count(), 3)
+        self.assertAlmostEqual(dataset.avg_pressure, 4.0)
+
+    @override_settings(INGEST_CHUNK_SIZE=2)
+    def test_upload_precomputes_type_stats(self):
+        self.upload()
+
+        pump = DatasetTypeStats.objects.get(equipment_type='Pump')
+        self.assertEqual(pump.count, 2)
+        self.assertEqual((pump.flowrate_min, pump.flowrate_max), (10.0, 20.0))
+        self.assertAlmostEqual(pump.pressure_sumsq, 20.0)
+        self.assertAlmostEqual(pump.std('temperature'), 10.0)
+
+        response = self.client.get(reverse('summary'))
+        self.assertEqual(response.json()['type_distribution'], [
+            {'equipment_type': 'Pump', 'count': 2, 'avg_flow': 15.0, 'avg_press': 3.0, 'avg_temp': 40.0},
+            {'equipment_type': 'Reactor', 'count': 1, 'avg_flow': 30.0, 'avg_press': 6.0, 'avg_temp': 70.0},
+        ])
+
+    def test_job_endpoint_reports_progress(self):
+        job_id = self.upload().json()['id']
+
+        response = self.client.get(reverse('job_detail', args=[job_id]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['state'], UploadJob.SUCCEEDED)
+        self.assertEqual(data['rows_processed'], 3)
+        self.assertEqual(data['dataset'], str(Dataset.objects.get().pk))
+        self.assertFalse(UploadJob.objects.get().file)
+
+    def test_stale_job_is_marked_failed_when_polled(self):
+        job = UploadJob.objects.create(filename='lost.csv', state=UploadJob.RUNNING)
+        long_ago = job.updated_at - datetime.timedelta(hours=1)
+        UploadJob.objects.filter(pk=job.pk).update(updated_at=long_ago)
+        live = UploadJob.objects.create(filename='live.csv', state=UploadJob.RUNNING)
+        UploadJob.objects.filter(pk=live.pk).update(updated_at=long_ago)
+        jobs.heartbeat(live.pk, 10)
+        self.addCleanup(jobs.job_cache().delete, jobs.progress_key(live.pk))
+
+        data = self.client.get(reverse('job_detail', args=[job.pk])).json()
+        self.assertEqual(data['state'], UploadJob.FAILED)
+        self.assertIn('restarted', data['error'])
+        data = self.client.get(reverse('job_detail', args=[live.pk])).json()
+        self.assertEqual((data['state'], data['rows_processed']), (UploadJob.RUNNING, 10))
+
+        # A worker that reaches a job given up on leaves it alone
+        self.assertEqual(jobs.run_job(job.pk).state, UploadJob.FAILED)
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_job_records_ingest_errors(self):
+        with self.assertLogs('core.jobs', 'ERROR'):
+            job_id = self.upload(SAMPLE_CSV + "Pump-3,Pump,not-a-number,1,1\n").json()['id']
+
+        data = self.client.get(reverse('job_detail', args=[job_id])).json()
+        self.assertEqual(data['state'], UploadJob.FAILED)
+        self.assertIn('CSV Processing Error', data['error'])
+        self.assertFalse(Dataset.objects.exists())
+
+
+class LoaderSelectionTests(TestCase):
+    def test_auto_uses_insert_loader_on_sqlite(self):
+        self.assertIsInstance(get_loader('auto'), InsertLoader)
+
+    def test_copy_loader_requires_postgresql(self):
+        with self.assertRaises(ValueError):
+            get_loader(CopyLoader.name)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        response_cache.reset_stats()
+        self.dataset = Dataset.objects.create(filename='cached.csv', total_records=1)
+        Equipment.objects.create(dataset=self.dataset, equipment_name='P-1', equipment_type='Pump',
+                                 flowrate=1.0, pressure=2.0, temperature=3.0)
+
+    def test_summary_is_served_from_cache(self):
+        first = self.client.get(reverse('summary'))
+        second = self.client.get(reverse('summary'))
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(self.client.get(reverse('cache_stats')).json(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_cache_is_keyed_by_query_params(self):
+        self.client.get(reverse('history_detail', args=[self.dataset.pk]))
+        response = self.client.get(reverse('history_detail', args=[self.dataset.pk]), {'page': 2})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_invalidate_drops_dataset_entries(self):
+        url = reverse('history_detail', args=[self.dataset.pk])
+        self.client.get(url)
+        response_cache.invalidate(self.dataset.pk)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='etag.csv')
+
+    def assertRevalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def test_read_endpoints_return_304_on_match(self):
+        self.assertRevalidates(reverse('summary'))
+        self.assertRevalidates(reverse('history_list'))
+        self.assertRevalidates(reverse('history_detail', args=[self.dataset.pk]))
+        reports.render(self.dataset)
+        self.assertRevalidates(reverse('pdf_report', args=[self.dataset.pk]))
+
+    def test_history_detail_etag_varies_on_host(self):
+        # equipment_url in the body is absolute
+        url = reverse('history_detail', args=[self.dataset.pk])
+        etag = self.assertRevalidates(url)
+        response = self.client.get(url, HTTP_HOST='api.example.com', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gzipped_responses_still_revalidate(self):
+        Equipment.objects.bulk_create(
+            Equipment(dataset=self.dataset, equipment_name=f'EQ-{i}', equipment_type='Pump',
+                      flowrate=1.0, pressure=2.0, temperature=3.0)
+            for i in range(50)
+        )
+        response = self.client.get(reverse('summary'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        response = self.client.get(reverse('summary'), HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_only_json_is_gzipped(self):
+        reports.render(self.dataset)
+        response = self.client.get(reverse('pdf_report', args=[self.dataset.pk]), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(int(response['Content-Length']), os.path.getsize(reports.cached_report(self.dataset)))
+        response.close()
+
+        with mock.patch.object(batch, 'get_pool', return_value=InlinePool()):
+            response = self.client.post(reverse('batch_report'), {'ids': [str(self.dataset.pk)]},
+                                        content_type='application/json', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('Content-Encoding', response)
+            zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        reports.discard(self.dataset.pk)
+
+    def test_history_etag_changes_with_new_dataset(self):
+        etag = self.assertRevalidates(reverse('history_list'))
+        Dataset.objects.create(filename='newer.csv')
+        response = self.client.get(reverse('history_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_summary_etag_follows_latest_dataset(self):
+        etag = self.assertRevalidates(reverse('summary'))
+        newer = Dataset.objects.create(filename='newer.csv')
+        response = self.client.get(reverse('summary'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['dataset_id'], str(newer.pk))
+
+
+class DatasetEquipmentViewTests(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='paged.csv')
+        Equipment.objects.bulk_create(
+            Equipment(dataset=self.dataset, equipment_name=f'EQ-{i}', equipment_type='Pump' if i % 2 else 'Valve',
+                      flowrate=float(i), pressure=float(i), temperature=float(i))
+            for i in range(10)
+        )
+        self.url = reverse('dataset_equipment', args=[self.dataset.pk])
+
+    def test_detail_links_to_equipment_instead_of_nesting(self):
+        data = self.client.get(reverse('history_detail', args=[self.dataset.pk])).json()
+        self.assertNotIn('equipment', data)
+        self.assertTrue(data['equipment_url'].endswith(self.url))
+
+    def test_cursor_pages_cover_every_row_once(self):
+        names, url = [], self.url + '?page_size=4'
+        while url:
+            page = self.client.get(url).json()
+            names += [row['equipment_name'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(names, [f'EQ-{i}' for i in range(10)])
+
+    @skipUnless(connection.vendor == 'sqlite', "matches SQLite's plan wording")
+    def test_deep_page_seeks_instead_of_sorting(self):
+        page = self.client.get(self.url + '?page_size=4').json()
+        page = self.client.get(page['next']).json()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(page['next'])
+        sql = next(q['sql'] for q in queries.captured_queries if 'FROM "core_equipment"' in q['sql'])
+        self.assertIn('"core_equipment"."id" >', sql)
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('equipment_dataset_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_fields_projection_and_filters(self):
+        response = self.client.get(self.url, {'fields': 'pressure', 'type': 'Pump', 'pressure_min': 3, 'pressure_max': 7})
+        self.assertEqual(response.json()['results'], [{'pressure': 3.0}, {'pressure': 5.0}, {'pressure': 7.0}])
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'fields': 'secret'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'flowrate_min': 'x'}).status_code, 400)
+
+    def test_unknown_dataset_is_404(self):
+        missing = reverse('dataset_equipment', args=['00000000-0000-0000-0000-000000000000'])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+
+class DatasetColumnsViewTests(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='columns.csv')
+        Equipment.objects.bulk_create([
+            Equipment(dataset=self.dataset, equipment_name='A', equipment_type='Valve', flowrate=1.0, pressure=2.0, temperature=3.0),
+            Equipment(dataset=self.dataset, equipment_name='B', equipment_type='Pump', flowrate=4.0, pressure=5.0, temperature=6.0),
+            Equipment(dataset=self.dataset, equipment_name='C', equipment_type='Valve', flowrate=7.0, pressure=8.0, temperature=9.0),
+        ])
+        self.url = reverse('dataset_columns', args=[self.dataset.pk])
+
+    def test_npz_is_the_default_representation(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'application/x-npz')
+        archive = np.load(io.BytesIO(response.content))
+        np.testing.assert_array_equal(archive['pressure'], [2.0, 5.0, 8.0])
+        self.assertEqual(archive['type_codes'].dtype, np.uint8)
+        self.assertEqual(archive['type_labels'][archive['type_codes']].tolist(), ['Valve', 'Pump', 'Valve'])
+
+    def test_json_by_content_negotiation(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['type_labels'], ['Pump', 'Valve'])
+        self.assertEqual(response.json()['type_codes'], [1, 0, 1])
+        self.assertIn('Accept', response['Vary'])
+
+    def test_errors_are_json(self):
+        missing = '00000000-0000-0000-0000-000000000000'
+        for name in ('dataset_columns', 'dataset_export'):
+            response = self.client.get(reverse(name, args=[missing]))
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('detail', response.json())
+
+
+class DatasetExportViewTests(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='plant.csv')
+        Equipment.objects.bulk_create(
+            Equipment(dataset=self.dataset, equipment_name=f'EQ-{i}', equipment_type='Pump',
+                      flowrate=float(i), pressure=1.5, temperature=20.0)
+            for i in range(2500)
+        )
+        self.url = reverse('dataset_export', args=[self.dataset.pk])
+
+    def test_csv_export_streams_reuploadable_rows(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="plant.csv"')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Equipment Name,Type,Flowrate,Pressure,Temperature')
+        self.assertEqual(lines[1], 'EQ-0,Pump,0.0,1.5,20.0')
+        self.assertEqual(len(lines), 2501)
+
+    def test_ndjson_export_by_accept_header(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 2500)
+        self.assertEqual(rows[-1], {'equipment_name': 'EQ-2499', 'equipment_type': 'Pump',
+                                    'flowrate': 2499.0, 'pressure': 1.5, 'temperature': 20.0})
+
+
+class AsyncReadViewTests(TestCase):
+    """The async views must be drop-in replacements for the DRF ones."""
+
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.dataset = Dataset.objects.create(filename='plant.csv', total_records=1200)
+        Equipment.objects.bulk_create(
+            Equipment(dataset=self.dataset, equipment_name=f'EQ-{i}', equipment_type='Pump' if i % 3 else 'Valve',
+                      flowrate=float(i), pressure=1.5, temperature=20.0)
+            for i in range(1200)
+        )
+        DatasetTypeStats.objects.create(dataset=self.dataset, equipment_type='Pump', count=800)
+        DatasetTypeStats.objects.create(dataset=self.dataset, equipment_type='Valve', count=400)
+        self.factory = AsyncRequestFactory()
+
+    async def assertMatchesSync(self, name, view, args=(), data=None, **headers):
+        url = reverse(name, args=args)
+        expected = await self.async_client.get(url, data, headers=headers)
+        response = await view(self.factory.get(url, data, headers=headers), *args)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.get('ETag'), expected.get('ETag'))
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        if expected.streaming:
+            self.assertEqual(response['Content-Disposition'], expected['Content-Disposition'])
+            body = b''.join([chunk async for chunk in response.streaming_content])
+            # The sync view's rows come from the sync ORM; drain them off the event loop
+            self.assertEqual(body, await sync_to_async(b''.join)(expected.streaming_content))
+        else:
+            self.assertEqual(json.loads(response.content), expected.json())
+        return response
+
+    async def test_summary_matches_sync_view(self):
+        response = await self.assertMatchesSync('summary', async_views.summary, data={'points': 50})
+        # The sync request above filled the shared response cache
+        self.assertEqual(response['X-Cache'], 'HIT')
+        response = await async_views.summary(self.factory.get('/', {'points': 'x'}))
+        self.assertEqual(response.status_code, 400)
+
+    async def test_history_list_matches_sync_view(self):
+        response = await self.assertMatchesSync('history_list', async_views.history_list)
+        revalidated = await async_views.history_list(self.factory.get('/', headers={'If-None-Match': response['ETag']}))
+        self.assertEqual(revalidated.status_code, 304)
+
+    async def test_export_matches_sync_view(self):
+        args = (self.dataset.pk,)
+        await self.assertMatchesSync('dataset_export', async_views.dataset_export, args, {'format': 'csv'})
+        await self.assertMatchesSync('dataset_export', async_views.dataset_export, args,
+                                     Accept='application/x-ndjson')
+
+    async def test_export_errors_match_sync_view(self):
+        missing = ('00000000-0000-0000-0000-000000000000',)
+        for args, data in [((self.dataset.pk,), {'format': 'xml'}), (missing, {'format': 'csv'}), (missing, {'format': 'xml'})]:
+            with self.subTest(args=args, data=data):
+                response = await self.assertMatchesSync('dataset_export', async_views.dataset_export, args, data)
+                self.assertEqual(response.status_code, 404)
+
+
+class SamplingTests(TestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.dataset = Dataset.objects.create(filename='scatter.csv')
+        Equipment.objects.bulk_create(
+            Equipment(dataset=self.dataset, equipment_name=f'EQ-{i}', equipment_type='Valve' if i % 10 else 'Pump',
+                      flowrate=float(i), pressure=float(i % 7), temperature=float(i))
+            for i in range(200)
+        )
+
+    def test_allocate_keeps_every_stratum(self):
+        self.assertEqual(sampling.allocate([90, 9, 1], 10).tolist(), [8, 1, 1])
+        self.assertEqual(sampling.allocate([5, 5], 1).sum(), 1)
+
+    def test_sample_rows_come_from_the_column_scan(self):
+        with self.assertNumQueries(1):
+            points = sampling.sample_points(self.dataset, 20, sampling.LTTB)
+        self.assertEqual(len(points), 20)
+        ids = [int(p['equipment_name'][3:]) for p in points]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(points[0], {'equipment_name': 'EQ-0', 'flowrate': 0.0, 'pressure': 0.0, 'temperature': 0.0})
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        x = np.arange(100, dtype=float)
+        y = np.zeros(100)
+        y[37] = 50.0
+        indices = sampling.lttb_indices(x, y, 10)
+        self.assertEqual(len(indices), 10)
+        self.assertEqual((indices[0], indices[-1]), (0, 99))
+        self.assertIn(37, indices)
+
+    def test_summary_samples_across_types(self):
+        data = self.client.get(reverse('summary'), {'points': 20}).json()
+        self.assertEqual(data['sampling'], {'strategy': 'stratified', 'points': 20})
+        names = [p['equipment_name'] for p in data['raw_data_points']]
+        self.assertEqual(sum(int(n[3:]) % 10 == 0 for n in names), 2)
+
+    def test_summary_grid_counts_cover_dataset(self):
+        data = self.client.get(reverse('summary'), {'points': 16, 'sampling': 'grid'}).json()
+        self.assertLessEqual(len(data['raw_data_points']), 16)
+        self.assertEqual(sum(p['count'] for p in data['raw_data_points']), 200)
+
+    def test_summary_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get(reverse('summary'), {'sampling': 'first'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('summary'), {'points': 0}).status_code, 400)
+
+
+class DatasetDensityViewTests(TestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        response_cache.reset_stats()
+        columnar.clear_cached_columns()
+        self.dataset = Dataset.objects.create(filename='density.csv')
+        Equipment.objects.bulk_create(
+            Equipment(dataset=self.dataset, equipment_name=f'EQ-{i}', equipment_type='Pump',
+                      flowrate=1.0, pressure=float(i % 10), temperature=float(i // 10))
+            for i in range(100)
+        )
+        self.url = reverse('dataset_density', args=[self.dataset.pk])
+
+    def test_counts_cover_every_point(self):
+        response = self.client.get(self.url, {'bins': 10})
+        data = response.json()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(data['counts']), 10)
+        self.assertEqual(len(data['x_edges']), 11)
+        self.assertEqual((data['total'], data['max']), (100, 1))
+
+    def test_zoom_window_rebins_cached_columns(self):
+        with mock.patch.object(columnar, 'fetch_columns', wraps=columnar.fetch_columns) as fetch:
+            self.client.get(self.url, {'bins': 10})
+            data = self.client.get(self.url, {'bins': 2, 'x_min': 0, 'x_max': 4, 'y_min': 0, 'y_max': 2}).json()
+        self.assertEqual(data['x_edges'], [0.0, 2.0, 4.0])
+        # rows are y bins: y in [0, 1) and [1, 2], x in [0, 2) and [2, 4]
+        self.assertEqual(data['counts'], [[2, 3], [4, 6]])
+        # the second window missed the grid cache but reused the columns
+        self.assertEqual(response_cache.stats()['hits'], 0)
+        fetch.assert_called_once()
+
+    def test_column_store_is_bounded_by_bytes(self):
+        other = Dataset.objects.create(filename='other.csv')
+        Equipment.objects.create(dataset=other, equipment_name='EQ', equipment_type='Pump',
+                                 flowrate=1.0, pressure=1.0, temperature=1.0)
+        # 100 rows of three float64 metrics
+        with override_settings(COLUMN_STORE_MAX_BYTES=100 * 3 * 8), \
+                mock.patch.object(columnar, 'fetch_columns', wraps=columnar.fetch_columns) as fetch:
+            columnar.cached_columns(self.dataset)
+            columnar.cached_columns(self.dataset)
+            self.assertEqual(fetch.call_count, 1)
+            # The second dataset pushes the store over the bound and evicts the first
+            columnar.cached_columns(other)
+            columnar.cached_columns(other)
+            columnar.cached_columns(self.dataset)
+        self.assertEqual(fetch.call_count, 3)
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'x': 'pressure', 'y': 'pressure'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'bins': 10000}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'x_min': 5, 'x_max': 1}).status_code, 400)
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN of the hot lookups with and without the indexes from 0004/0005."""
+
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='plan.csv')
+        Equipment.objects.create(dataset=self.dataset, equipment_name='P-1', equipment_type='Pump',
+                                 flowrate=1.0, pressure=2.0, temperature=3.0)
+
+    def drop_index(self, name):
+        # DDL is transactional on SQLite and PostgreSQL, so the test rollback restores it
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+    def explain(self, queryset, label):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            # The label keeps SQLite from reusing a plan compiled before the DROP
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} -- {label}', params)
+            return '\n'.join(' '.join(map(str, row)) for row in cursor.fetchall())
+
+    def assert_plan_uses(self, queryset, index):
+        with_index = self.explain(queryset, 'with index')
+        self.drop_index(index)
+        without_index = self.explain(queryset, 'without index')
+        self.assertIn(index, with_index)
+        self.assertNotIn(index, without_index)
+
+    def assert_reads_in_index_order(self, queryset, label='ordered'):
+        # SQLite reports a sort as "USE TEMP B-TREE FOR ORDER BY"
+        plan = self.explain(queryset, label)
+        self.assertIn('equipment_dataset_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    @skipUnless(connection.vendor == 'sqlite', "matches SQLite's plan wording")
+    def test_ordered_dataset_scan_does_not_sort(self):
+        queryset = Equipment.objects.filter(dataset=self.dataset).order_by('id').values_list('id', 'pressure')
+        self.assert_reads_in_index_order(queryset)
+        self.drop_index('equipment_dataset_id_idx')
+        self.assertIn('TEMP B-TREE', self.explain(queryset, 'without index'))
+
+    @skipUnless(connection.vendor == 'sqlite', "matches SQLite's plan wording")
+    def test_streamed_row_scans_do_not_sort(self):
+        # Exports, batch CSVs, report logs and fetch_columns all read through ordered_rows
+        for fields in (list(COLUMN_MAP), ['flowrate', 'pressure', 'temperature', 'equipment_type', 'id']):
+            self.assert_reads_in_index_order(columnar.ordered_rows(self.dataset, fields), label=','.join(fields))
+
+    def test_latest_dataset_uses_upload_date_index(self):
+        self.assert_plan_uses(Dataset.objects.order_by('-upload_date')[:1], 'dataset_upload_date_idx')
+
+    def test_type_scan_uses_composite_index(self):
+        queryset = Equipment.objects.filter(dataset=self.dataset, equipment_type='Pump').values('pressure')
+        self.assert_plan_uses(queryset, 'equipment_dataset_type_idx')
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.datasets = []
+        # Newest first: 0 days old, 1 day old, ...
+        for age in range(4):
+            dataset = Dataset.objects.create(filename=f'd{age}.csv', total_records=10)
+            Dataset.objects.filter(pk=dataset.pk).update(upload_date=now - datetime.timedelta(days=age))
+            Equipment.objects.create(dataset=dataset, equipment_name='P', equipment_type='Pump',
+                                     flowrate=1.0, pressure=1.0, temperature=1.0)
+            DatasetTypeStats.objects.create(dataset=dataset, equipment_type='Pump', count=1)
+            self.datasets.append(dataset)
+
+    def expired(self, **limits):
+        return retention.expired_ids(retention.RetentionPolicy(**limits))
+
+    def test_policy_limits(self):
+        ids = [d.pk for d in self.datasets]
+        self.assertEqual(self.expired(), [])
+        self.assertEqual(self.expired(keep_latest=2), ids[2:])
+        self.assertEqual(self.expired(max_age_days=2, keep_latest=10), ids[2:])
+        self.assertEqual(self.expired(max_rows=25), ids[2:])
+        # The newest dataset survives any policy
+        self.assertEqual(self.expired(keep_latest=0, max_rows=0), ids[1:])
+
+    def test_prune_deletes_rows_with_one_statement_per_table(self):
+        job = UploadJob.objects.create(filename='d3.csv', dataset=self.datasets[3])
+        with self.assertNumQueries(6):  # select expired, select datasets, 2 fast deletes, null jobs, delete
+            result = retention.prune(retention.RetentionPolicy(keep_latest=3))
+        self.assertEqual(result.dataset_ids, [self.datasets[3].pk])
+        self.assertEqual(result.deleted, {'core.Equipment': 1, 'core.DatasetTypeStats': 1, 'core.Dataset': 1})
+        self.assertEqual(Equipment.objects.count(), 3)
+        job.refresh_from_db()
+        self.assertIsNone(job.dataset)
+
+    def test_command_dry_run_keeps_datasets(self):
+        out = io.StringIO()
+        call_command('prune_datasets', '--keep-latest', '1', '--dry-run', stdout=out)
+        self.assertIn("Would delete 3 datasets", out.getvalue())
+        self.assertEqual(Dataset.objects.count(), 4)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PDFReportViewTests(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='report.csv', total_records=1)
+        Equipment.objects.create(dataset=self.dataset, equipment_name='P-1', equipment_type='Pump',
+                                 flowrate=1.0, pressure=2.0, temperature=3.0)
+        self.url = reverse('pdf_report', args=[self.dataset.pk])
+
+    def tearDown(self):
+        reports.discard(self.dataset.pk)
+        reports.release(self.dataset.pk)
+        reports.pop_failure(self.dataset.pk)
+
+    def test_uncached_report_is_rendered_in_background(self):
+        with mock.patch.object(reports, 'schedule') as schedule:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertNotIn('ETag', response)
+        schedule.assert_called_once_with(self.dataset)
+
+    def test_rendered_report_is_served_from_disk(self):
+        reports.render(self.dataset)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Report_report.csv.pdf"')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_failed_render_is_reported_then_retried(self):
+        reports.record_failure(self.dataset.pk, 'boom')
+        self.assertEqual(self.client.get(self.url).status_code, 500)
+        with mock.patch.object(reports, 'schedule'):
+            self.assertEqual(self.client.get(self.url).status_code, 202)
+
+    def test_render_is_claimed_once_in_the_shared_pool(self):
+        pool = mock.Mock()
+        pool.submit.return_value = Future()
+        with mock.patch.object(batch, 'get_pool', return_value=pool):
+            reports.schedule(self.dataset)
+            reports.schedule(self.dataset)
+        pool.submit.assert_called_once_with(report_worker.render_claimed, self.dataset.pk)
+        self.assertTrue(reports.rendering(self.dataset.pk))
+
+        # The worker process releases the claim once the report is on disk
+        reports.render_claimed(self.dataset.pk)
+        self.assertFalse(reports.rendering(self.dataset.pk))
+        self.assertIsNotNone(reports.cached_report(self.dataset))
+
+    def test_failures_are_recorded_for_every_process(self):
+        with mock.patch.object(batch, 'get_pool', return_value=InlinePool()), \
+                mock.patch.object(reports, 'render', side_effect=RuntimeError('boom')), \
+                self.assertLogs('core.reports', 'ERROR'):
+            reports.schedule(self.dataset)
+        self.assertFalse(reports.rendering(self.dataset.pk))
+        self.assertIn('boom', self.client.get(self.url).json()['error'])
+
+        # A worker process that dies mid-render fails the claim too
+        lost = Future()
+        pool = mock.Mock()
+        pool.submit.return_value = lost
+        with mock.patch.object(batch, 'get_pool', return_value=pool), self.assertLogs('core.reports', 'ERROR'):
+            reports.schedule(self.dataset)
+            lost.set_exception(batch.BrokenProcessPool('killed'))
+        self.assertFalse(reports.rendering(self.dataset.pk))
+        self.assertEqual(reports.pop_failure(self.dataset.pk), 'killed')
+
+    def test_detail_log_is_split_into_fixed_size_tables(self):
+        rows = iter([('P', 'Pump', 1.0, 2.0, 3.0)] * 450)
+        tables = list(reports.detail_tables(rows, chunk_rows=200))
+        self.assertEqual([len(t._cellvalues) for t in tables], [201, 201, 51])
+        self.assertTrue(all(t.repeatRows == 1 for t in tables))
+
+    def test_capped_log_ends_with_type_summary_pages(self):
+        Equipment.objects.create(dataset=self.dataset, equipment_name='V-1', equipment_type='Valve',
+                                 flowrate=1.0, pressure=2.0, temperature=3.0)
+        self.dataset.total_records = 2
+        for equipment_type in ('Pump', 'Valve'):
+            DatasetTypeStats.objects.create(dataset=self.dataset, equipment_type=equipment_type, count=1)
+        with mock.patch.object(reports.SimpleDocTemplate, 'build') as build:
+            reports.build_report(self.dataset, io.BytesIO(), max_detail_rows=1)
+        flowables = list(build.call_args.args[0])
+        detail = [f for f in flowables if isinstance(f, reports.Table) and f.repeatRows == 1]
+        self.assertEqual([len(t._cellvalues) for t in detail], [2])
+        self.assertEqual(sum(isinstance(f, reports.PageBreak) for f in flowables), 2)
+
+    def test_lazy_flowables_follow_list_protocol(self):
+        generated = []
+        def source():
+            for i in range(5):
+                generated.append(i)
+                yield i
+        flowables = reports.LazyFlowables(source())
+        self.assertEqual(flowables[0], 0)
+        self.assertEqual(generated, [0])
+        del flowables[0]
+        flowables[0:0] = ['a', 'b']
+        flowables.insert(0, 'c')
+        self.assertEqual(list(flowables), ['c', 'a', 'b', 1, 2, 3, 4])
+
+    @override_settings(REPORT_DELIVERY='stream')
+    def test_stream_delivery_renders_per_request(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertIsNone(reports.cached_report(self.dataset))
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=MEDIA_ROOT))
+    def test_eviction_drops_least_recently_used(self):
+        os.makedirs(reports.report_dir())
+        paths = []
+        for age in (3, 2, 1):
+            path = os.path.join(reports.report_dir(), f'{self.dataset.pk}-{age}-v0.pdf')
+            with open(path, 'wb') as file:
+                file.write(b'x' * 100)
+            os.utime(path, (age, 1000 - age))
+            paths.append(path)
+        reports.evict(max_bytes=250)
+        self.assertEqual([os.path.exists(p) for p in paths], [False, True, True])
+
+
+class InlinePool:
+    """Stands in for the batch process pool; workers could not see the test transaction."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BatchReportViewTests(TestCase):
+    def setUp(self):
+        self.datasets = []
+        for name in ('a.csv', 'b.csv'):
+            dataset = Dataset.objects.create(filename=name, total_records=1)
+            Equipment.objects.create(dataset=dataset, equipment_name='P-1', equipment_type='Pump',
+                                     flowrate=1.0, pressure=2.0, temperature=3.0)
+            self.datasets.append(dataset)
+        self.url = reverse('batch_report')
+
+    def tearDown(self):
+        for dataset in self.datasets:
+            reports.discard(dataset.pk)
+
+    def post(self, **data):
+        with mock.patch.object(batch, 'get_pool', return_value=InlinePool()):
+            response = self.client.post(self.url, data, content_type='application/json')
+            if response.status_code != 200:
+                return response, None
+            return response, zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_reports_are_rendered_and_zipped(self):
+        reports.render(self.datasets[0])
+        with mock.patch.object(reports, 'render', wraps=reports.render) as render:
+            response, archive = self.post(ids=[str(d.pk) for d in self.datasets])
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="reports.zip"')
+        self.assertEqual(sorted(archive.namelist()), ['Report_a.csv.pdf', 'Report_b.csv.pdf'])
+        self.assertTrue(archive.read('Report_b.csv.pdf').startswith(b'%PDF'))
+        # Only the uncached report was rendered
+        render.assert_called_once()
+        self.assertEqual(render.call_args.args[0].pk, self.datasets[1].pk)
+
+    def test_csv_exports_and_duplicate_names(self):
+        self.datasets[1].filename = 'a.csv'
+        self.datasets[1].save()
+        response, archive = self.post(ids=[str(d.pk) for d in self.datasets], formats=['csv'])
+        self.assertEqual(archive.namelist(), ['a.csv', f'a_{self.datasets[1].pk}.csv'])
+        self.assertEqual(archive.read('a.csv').decode().splitlines()[1], 'P-1,Pump,1.0,2.0,3.0')
+
+    def test_failed_render_becomes_error_entry(self):
+        with mock.patch.object(reports, 'render', side_effect=RuntimeError('boom')):
+            response, archive = self.post(ids=[str(self.datasets[0].pk)])
+        self.assertIn('boom', archive.read('Report_a.csv.error.txt').decode())
+
+    def test_broken_pool_is_replaced_and_render_retried(self):
+        broken = mock.Mock()
+        broken.submit.return_value = Future()
+        broken.submit.return_value.set_exception(batch.BrokenProcessPool('worker died'))
+        with mock.patch.object(batch, 'get_pool', side_effect=[broken, InlinePool()]):
+            response = self.client.post(self.url, {'ids': [str(self.datasets[0].pk)]}, content_type='application/json')
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ['Report_a.csv.pdf'])
+
+        batch._pool = broken
+        batch.discard_pool(broken)
+        self.assertIsNone(batch._pool)
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+
+    def test_evicted_report_is_rendered_again(self):
+        missing = os.path.join(MEDIA_ROOT, 'evicted.pdf')
+        with mock.patch.object(reports, 'cached_report', side_effect=[missing, None]):
+            response, archive = self.post(ids=[str(self.datasets[0].pk)])
+        self.assertTrue(archive.read('Report_a.csv.pdf').startswith(b'%PDF'))
+
+    def test_invalid_requests(self):
+        response, _ = self.post(ids=[])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ids', response.json()['error'])
+        response, _ = self.post(ids=['not-a-uuid'])
+        self.assertEqual(response.status_code, 400)
+        missing = '00000000-0000-0000-0000-000000000000'
+        response, _ = self.post(ids=[missing])
+        self.assertEqual(response.status_code, 404)
+        self.assertIn(missing, response.json()['error'])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, REPORT_CHART_POINTS=10)
+class ReportChartTests(TestCase):
+    def setUp(self):
+        self.dataset = Dataset.objects.create(filename='charts.csv', total_records=100)
+        Equipment.objects.bulk_create(
+            Equipment(dataset=self.dataset, equipment_name=f'EQ-{i}', equipment_type='Pump',
+                      flowrate=1.0, pressure=float(i), temperature=float(i))
+            for i in range(100)
+        )
+        DatasetTypeStats.objects.create(dataset=self.dataset, equipment_type='Pump', count=100)
+
+    def tearDown(self):
+        charts.discard(self.dataset.pk)
+
+    def test_strided_points_are_bounded_and_spread(self):
+        points = sampling.strided_points(self.dataset, 10)
+        self.assertEqual(len(points), 10)
+        self.assertEqual((points[0]['pressure'], points[-1]['pressure']), (0.0, 99.0))
+
+    def test_strided_points_follow_rows_of_interleaved_uploads(self):
+        # Two uploads ingested at once interleave their ids
+        other = Dataset.objects.create(filename='other.csv', total_records=50)
+        mixed = Dataset.objects.create(filename='mixed.csv', total_records=50)
+        Equipment.objects.bulk_create(
+            Equipment(dataset=(mixed, other)[i % 2], equipment_name=f'EQ-{i}', equipment_type='Pump',
+                      flowrate=1.0, pressure=float(i // 2), temperature=float(i % 2))
+            for i in range(100)
+        )
+        with self.assertNumQueries(1):
+            points = sampling.strided_points(mixed, 10)
+        self.assertEqual(len(points), 10)
+        self.assertEqual({p['temperature'] for p in points}, {0.0})
+        self.assertEqual((points[0]['pressure'], points[-1]['pressure']), (0.0, 49.0))
+
+    def test_charts_are_drawn_once_per_dataset(self):
+        for name in charts.CHARTS:
+            with open(charts.chart_png(self.dataset, name), 'rb') as file:
+                self.assertEqual(file.read(8), b'\x89PNG\r\n\x1a\n')
+        with mock.patch.dict(charts.CHARTS, {name: mock.Mock() for name in charts.CHARTS}):
+            charts.chart_png(self.dataset, 'pressure_temperature')
+            charts.CHARTS['pressure_temperature'].assert_not_called()
+
+    def test_changing_point_budget_redraws_charts(self):
+        chart = charts.chart_png(self.dataset, 'pressure_temperature')
+        report = reports.report_path(self.dataset.pk, self.dataset.upload_date)
+        with override_settings(REPORT_CHART_POINTS=20):
+            with mock.patch.object(charts, 'strided_points', wraps=charts.strided_points) as sample:
+                self.assertNotEqual(charts.chart_png(self.dataset, 'pressure_temperature'), chart)
+            sample.assert_called_once_with(self.dataset, 20)
+            # Cached PDFs embed the chart, so they are keyed on the budget too
+            self.assertNotEqual(reports.report_path(self.dataset.pk, self.dataset.upload_date), report)
@@ -1,11 +1,32 @@
+from django.conf import settings
 from django.urls import path
-from .views import UploadView, SummaryView, HistoryListView, HistoryDetailView, PDFReportView, ApiRootView
+from . import async_views
+from .views import UploadView, SummaryView, HistoryListView, HistoryDetailView, PDFReportView, ApiRootView, UploadJobDetailView, CacheStatsView, DatasetEquipmentView, DatasetColumnsView, DatasetExportView, DatasetDensityView, BatchReportView
 
 urlpatterns = [
     path('', ApiRootView.as_view(), name='api_root'),
     path('upload/', UploadView.as_view(), name='upload'),
+    path('jobs/<uuid:pk>/', UploadJobDetailView.as_view(), name='job_detail'),
     path('summary/', SummaryView.as_view(), name='summary'),
     path('history/', HistoryListView.as_view(), name='history_list'),
     path('history/<uuid:pk>/', HistoryDetailView.as_view(), name='history_detail'),
+    path('datasets/<uuid:pk>/equipment/', DatasetEquipmentView.as_view(), name='dataset_equipment'),
+    path('datasets/<uuid:pk>/columns/', DatasetColumnsView.as_view(), name='dataset_columns'),
+    path('datasets/<uuid:pk>/export/', DatasetExportView.as_view(), name='dataset_export'),
+    path('datasets/<uuid:pk>/density/', DatasetDensityView.as_view(), name='dataset_density'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
     path('report/<uuid:pk>/', PDFReportView.as_view(), name='pdf_report'),
+    path('reports/batch/', BatchReportView.as_view(), name='batch_report'),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # Same URLs and names, served by the async views
+    async_routes = {
+        'summary': async_views.summary,
+        'history_list': async_views.history_list,
+        'dataset_export': async_views.dataset_export,
+    }
+    urlpatterns = [
+        path(str(p.pattern), async_routes[p.name], name=p.name) if p.name in async_routes else p
+        for p in urlpatterns
+    ]
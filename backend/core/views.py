@@ -2,17 +2,39 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status, generics
-from django.db.models import Count, Avg
-from .models import Dataset, Equipment
-from .serializers import DatasetSerializer, DatasetListSerializer, FileUploadSerializer
-import pandas as pd
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import io
-import datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from .models import Dataset, Equipment, UploadJob
+from .serializers import DatasetSerializer, DatasetListSerializer, EquipmentSerializer, FileUploadSerializer, UploadJobSerializer, BatchReportSerializer
+from .pagination import EquipmentCursorPagination
+from .renderers import CSVRenderer, NDJSONRenderer, NpzRenderer
+from .loaders import COLUMN_MAP
+from .columnar import METRICS, cached_columns, fetch_columns, ordered_rows
+from .ingest import SchemaError, check_header
+from . import batch
+from . import jobs
+from . import reports
+from . import sampling
+from . import cache as response_cache
+from . import etags
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+import os
 from rest_framework.reverse import reverse
 
+class JSONErrorsMixin:
+    """Render error responses as JSON on views whose renderers are binary or tabular formats."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(response, 'exception', False):
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+
 class ApiRootView(APIView):
     def get(self, request):
         return Response({
@@ -34,53 +56,27 @@ class UploadView(APIView):
         file = serializer.validated_data['file']
         try:
             try:
-                df = pd.read_csv(file)
-                
-                # Normalize columns: lowercase, replace _ with space, strip units
-                original_cols = df.columns.tolist()
-                df.columns = [c.split('(')[0].strip().replace('_', ' ').title() for c in df.columns]
-                
-                # Validation of normalized columns
-                required_cols = {'Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'}
-                if not required_cols.issubset(set(df.columns)):
-                    missing = required_cols - set(df.columns)
-                    return Response({"error": f"Missing columns. Required: {list(missing)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-                # Create Dataset
-                dataset = Dataset.objects.create(filename=file.name)
-                
-                # Bulk create equipment
-                equipment_list = []
-                for _, row in df.iterrows():
-                    equipment_list.append(Equipment(
-                        dataset=dataset,
-                        equipment_name=row['Equipment Name'],
-                        equipment_type=row['Type'],
-                        flowrate=row['Flowrate'],
-                        pressure=row['Pressure'],
-                        temperature=row['Temperature']
-                    ))
-                Equipment.objects.bulk_create(equipment_list)
-
-                # Calculate stats
-                dataset.total_records = len(equipment_list)
-                dataset.avg_flowrate = df['Flowrate'].mean() if not df.empty else 0
-                dataset.avg_pressure = df['Pressure'].mean() if not df.empty else 0
-                dataset.avg_temperature = df['Temperature'].mean() if not df.empty else 0
-                dataset.save()
-
-                # Maintain only last 5 datasets
-                all_datasets = Dataset.objects.all().order_by('-upload_date')
-                if all_datasets.count() > 5:
-                    ids_to_keep = all_datasets[:5].values_list('id', flat=True)
-                    Dataset.objects.exclude(id__in=ids_to_keep).delete()
-
-                return Response(DatasetSerializer(dataset).data, status=status.HTTP_201_CREATED)
+                # Reject bad headers up front; the rows are ingested by a background job
+                check_header(file)
+            except SchemaError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
                 return Response({"error": f"CSV Processing Error: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+            job = UploadJob.objects.create(filename=file.name, file=file)
+            jobs.enqueue(job)
+            return Response(UploadJobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             return Response({"error": f"Server Error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class UploadJobDetailView(generics.RetrieveAPIView):
+    queryset = UploadJob.objects.all()
+    serializer_class = UploadJobSerializer
+
+    def get_object(self):
+        return jobs.fail_if_stale(super().get_object())
+
+@method_decorator(condition(etag_func=etags.summary_etag), name='get')
 class SummaryView(APIView):
     def get(self, request):
         # Get latest dataset by default
@@ -88,143 +84,268 @@ class SummaryView(APIView):
         if not latest_dataset:
             return Response({"message": "No data available"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Type distribution and stats per type
-        type_dist = list(latest_dataset.equipment.values('equipment_type').annotate(
-            count=Count('equipment_type'),
-            avg_flow=Avg('flowrate'),
-            avg_press=Avg('pressure'),
-            avg_temp=Avg('temperature')
-        ))
+        points, strategy = self.get_sampling()
+        payload, hit = response_cache.get_or_set(
+            'summary', latest_dataset.pk, request.query_params,
+            lambda: self.build_summary(latest_dataset, points, strategy),
+        )
+        return Response(payload, headers={'X-Cache': 'HIT' if hit else 'MISS'})
 
-        # Raw data points for scatter plot (limit to 50 for performance)
-        raw_data = list(latest_dataset.equipment.all()[:50].values('equipment_name', 'flowrate', 'pressure', 'temperature'))
+    def get_sampling(self):
+        return sampling_params(self.request.query_params)
 
-        return Response({
-            "dataset_id": latest_dataset.id,
-            "filename": latest_dataset.filename,
-            "total_count": latest_dataset.total_records,
-            "avg_flowrate": latest_dataset.avg_flowrate,
-            "avg_pressure": latest_dataset.avg_pressure,
-            "avg_temperature": latest_dataset.avg_temperature,
-            "type_distribution": type_dist,
-            "raw_data_points": raw_data
-        })
+    def build_summary(self, latest_dataset, points, strategy):
+        # Type distribution and stats per type, precomputed at ingest
+        type_dist = [stats.as_distribution() for stats in latest_dataset.type_stats.all()]
+
+        # Representative scatter points, downsampled from the whole dataset
+        raw_data = sampling.sample_points(latest_dataset, points, strategy)
+
+        return summary_payload(latest_dataset, type_dist, raw_data, strategy)
+
+def sampling_params(params):
+    """``(points, strategy)`` of the summary scatter from ?points= and ?sampling=."""
+    strategy = params.get('sampling', sampling.STRATIFIED)
+    if strategy not in sampling.STRATEGIES:
+        raise ValidationError({"error": f"sampling must be one of {list(sampling.STRATEGIES)}"})
+    try:
+        points = int(params.get('points', settings.SUMMARY_POINTS))
+    except ValueError:
+        raise ValidationError({"error": "points must be an integer"})
+    if not 1 <= points <= settings.SUMMARY_MAX_POINTS:
+        raise ValidationError({"error": f"points must be between 1 and {settings.SUMMARY_MAX_POINTS}"})
+    return points, strategy
 
+def summary_payload(latest_dataset, type_dist, raw_data, strategy):
+    return {
+        "dataset_id": latest_dataset.id,
+        "filename": latest_dataset.filename,
+        "total_count": latest_dataset.total_records,
+        "avg_flowrate": latest_dataset.avg_flowrate,
+        "avg_pressure": latest_dataset.avg_pressure,
+        "avg_temperature": latest_dataset.avg_temperature,
+        "type_distribution": type_dist,
+        "sampling": {"strategy": strategy, "points": len(raw_data)},
+        "raw_data_points": raw_data
+    }
+
+@method_decorator(condition(etag_func=etags.history_list_etag), name='get')
 class HistoryListView(generics.ListAPIView):
     queryset = Dataset.objects.all()
     serializer_class = DatasetListSerializer
 
+# The serialized body holds absolute URLs, so the cache entry and the ETag both vary on the host
+@method_decorator(condition(etag_func=etags.detail_etag('history_detail', vary=etags.absolute_base)), name='get')
 class HistoryDetailView(generics.RetrieveAPIView):
     queryset = Dataset.objects.all()
     serializer_class = DatasetSerializer
 
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+    def retrieve(self, request, *args, **kwargs):
+        dataset = self.get_object()
+        data, hit = response_cache.get_or_set(
+            'history_detail', dataset.pk, request.query_params,
+            lambda: self.get_serializer(dataset).data,
+            vary=etags.absolute_base(request),
+        )
+        return Response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+@method_decorator(condition(etag_func=etags.detail_etag('dataset_equipment')), name='get')
+class DatasetEquipmentView(generics.ListAPIView):
+    """Equipment rows of one dataset, keyset-paginated on id.
 
+    ?fields=a,b projects the columns returned; ?type= (repeatable) and
+    ?<metric>_min= / ?<metric>_max= filter rows server-side.
+    """
+    serializer_class = EquipmentSerializer
+    pagination_class = EquipmentCursorPagination
+    range_fields = ('flowrate', 'pressure', 'temperature')
+
+    def get_fields(self):
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return list(EquipmentSerializer.Meta.fields)
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = set(fields) - set(EquipmentSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError({"error": f"Unknown fields: {sorted(unknown)}"})
+        return fields
+
+    def get_queryset(self):
+        dataset = get_object_or_404(Dataset, pk=self.kwargs['pk'])
+        queryset = Equipment.objects.filter(dataset=dataset)
+
+        types = self.request.query_params.getlist('type')
+        if types:
+            queryset = queryset.filter(equipment_type__in=types)
+        for field in self.range_fields:
+            for bound, lookup in (('min', 'gte'), ('max', 'lte')):
+                value = self.request.query_params.get(f'{field}_{bound}')
+                if value is None:
+                    continue
+                try:
+                    queryset = queryset.filter(**{f'{field}__{lookup}': float(value)})
+                except ValueError:
+                    raise ValidationError({"error": f"{field}_{bound} must be a number"})
+
+        # Plain dicts skip model instantiation; id is always fetched for the cursor
+        return queryset.values(*dict.fromkeys(['id', *self.get_fields()]))
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs['fields'] = self.get_fields()
+        return super().get_serializer(*args, **kwargs)
+
+@method_decorator(vary_on_headers('Accept'), name='get')
+@method_decorator(condition(etag_func=etags.detail_etag('dataset_columns')), name='get')
+class DatasetColumnsView(JSONErrorsMixin, APIView):
+    """Whole-dataset columns: a NumPy .npz archive by default, or JSON lists."""
+    renderer_classes = [NpzRenderer, JSONRenderer]
+
+    def get(self, request, pk):
+        dataset = get_object_or_404(Dataset, pk=pk)
+        columns = fetch_columns(dataset)
+        if request.accepted_renderer.format != NpzRenderer.format:
+            columns = {name: values.tolist() for name, values in columns.items()}
+        return Response(columns)
+
+@method_decorator(condition(etag_func=etags.detail_etag('dataset_export')), name='get')
+class DatasetExportView(JSONErrorsMixin, APIView):
+    """Streams every equipment row of a dataset as CSV (re-uploadable) or NDJSON."""
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    def get(self, request, pk):
+        dataset = get_object_or_404(Dataset, pk=pk)
+        renderer = request.accepted_renderer
+        rows = ordered_rows(dataset, COLUMN_MAP).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        # CSV uses the upload headers so an export can be uploaded again as-is
+        columns = list(COLUMN_MAP.values()) if renderer.format == CSVRenderer.format else list(COLUMN_MAP)
+
+        response = StreamingHttpResponse(renderer.stream(columns, rows), content_type=renderer.media_type)
+        stem = os.path.splitext(dataset.filename)[0]
+        response['Content-Disposition'] = f'attachment; filename="{stem}.{renderer.format}"'
+        return response
+
+@method_decorator(condition(etag_func=etags.detail_etag('dataset_density')), name='get')
+class DatasetDensityView(APIView):
+    """2D histogram of one metric against another, for heatmap rendering.
+
+    ?x= and ?y= pick the metrics (temperature and pressure by default), ?bins=
+    the resolution per axis, and ?x_min= / ?x_max= / ?y_min= / ?y_max= the zoom
+    window. ``counts`` has one row per y bin and one column per x bin.
+    """
+
+    def get(self, request, pk):
+        dataset = get_object_or_404(Dataset, pk=pk)
+        x, y, bins, window = self.get_params()
+        payload, hit = response_cache.get_or_set(
+            'density', dataset.pk, request.query_params,
+            lambda: self.build_density(dataset, x, y, bins, window),
+        )
+        return Response(payload, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+    def get_params(self):
+        params = self.request.query_params
+        x = params.get('x', 'temperature')
+        y = params.get('y', 'pressure')
+        if x not in METRICS or y not in METRICS or x == y:
+            raise ValidationError({"error": f"x and y must be two different metrics of {list(METRICS)}"})
+        try:
+            bins = int(params.get('bins', settings.DENSITY_BINS))
+        except ValueError:
+            raise ValidationError({"error": "bins must be an integer"})
+        if not 1 <= bins <= settings.DENSITY_MAX_BINS:
+            raise ValidationError({"error": f"bins must be between 1 and {settings.DENSITY_MAX_BINS}"})
+
+        window = []
+        for name in ('x_min', 'x_max', 'y_min', 'y_max'):
+            value = params.get(name)
+            try:
+                window.append(float(value) if value is not None else None)
+            except ValueError:
+                raise ValidationError({"error": f"{name} must be a number"})
+        for lo, hi, axis in ((window[0], window[1], 'x'), (window[2], window[3], 'y')):
+            if lo is not None and hi is not None and lo >= hi:
+                raise ValidationError({"error": f"{axis}_min must be below {axis}_max"})
+        return x, y, bins, window
+
+    def build_density(self, dataset, x, y, bins, window):
+        # Whole-dataset columns are loaded once per process and re-binned for every zoom window
+        columns = cached_columns(dataset)
+        counts, x_edges, y_edges = sampling.density_grid(columns[x], columns[y], bins, window)
+        return {
+            "x": x,
+            "y": y,
+            "bins": bins,
+            "x_edges": x_edges.tolist(),
+            "y_edges": y_edges.tolist(),
+            "counts": counts.tolist(),
+            "total": int(counts.sum()),
+            "max": int(counts.max()),
+        }
+
+class CacheStatsView(APIView):
+    def get(self, request):
+        return Response(response_cache.stats())
+
+@method_decorator(condition(etag_func=etags.report_etag), name='get')
 class PDFReportView(APIView):
+    """Serves a dataset's PDF report.
+
+    By default the report comes from the on-disk cache, with 202 + Retry-After
+    while it is being rendered; REPORT_DELIVERY='stream' renders per request.
+    """
+
     def get(self, request, pk):
         try:
             dataset = Dataset.objects.get(pk=pk)
-            equipment = dataset.equipment.all()
         except Dataset.DoesNotExist:
             return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=50)
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Custom Styles
-        title_style = ParagraphStyle(
-            'ReportTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor("#0ea5e9"), # Primary Blue
-            spaceAfter=12,
-            fontName="Helvetica-Bold"
-        )
-        subtitle_style = ParagraphStyle(
-            'ReportSubtitle',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor("#64748b"), # Gray 500
-            spaceAfter=24,
-        )
-        section_header_style = ParagraphStyle(
-            'SectionHeader',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor("#334155"), # Slate 800
-            spaceBefore=20,
-            spaceAfter=10,
-            fontName="Helvetica-Bold"
-        )
+        filename = f"Report_{dataset.filename}.pdf"
+        if settings.REPORT_DELIVERY == 'stream':
+            return FileResponse(reports.stream_report(dataset), as_attachment=True,
+                                filename=filename, content_type='application/pdf')
+
+        path = reports.cached_report(dataset)
+        if path is None:
+            error = reports.pop_failure(dataset.pk)
+            if error:
+                return Response({"error": f"Report rendering failed: {error}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            reports.schedule(dataset)
+            return Response(
+                {"status": "rendering"},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Retry-After': str(settings.REPORT_RETRY_AFTER)},
+            )
+
+        # FileResponse hands the open file to the server's wsgi.file_wrapper (sendfile where available)
+        return FileResponse(open(path, 'rb'), as_attachment=True,
+                            filename=filename, content_type='application/pdf')
 
-        # 1. Header Section
-        elements.append(Paragraph("ChemVisualizer Analytics Report", title_style))
-        elements.append(Paragraph(f"Dataset: {dataset.filename}", subtitle_style))
-        elements.append(Paragraph(f"Generated on {datetime.datetime.now().strftime('%B %d, %Y at %H:%M')}", subtitle_style))
-        elements.append(Spacer(1, 0.2 * inch))
-
-        # 2. Executive Summary (Card-like table)
-        elements.append(Paragraph("Executive Summary", section_header_style))
-        summary_data = [
-            [Paragraph("<b>Total Records</b>", styles['Normal']), Paragraph("<b>Avg Flowrate</b>", styles['Normal']), Paragraph("<b>Avg Pressure</b>", styles['Normal']), Paragraph("<b>Avg Temp</b>", styles['Normal'])],
-            [f"{dataset.total_records}", f"{dataset.avg_flowrate:.1f} L/m", f"{dataset.avg_pressure:.1f} PSI", f"{dataset.avg_temperature:.1f} °C"]
-        ]
-        summary_table = Table(summary_data, colWidths=[1.5*inch]*4)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f1f5f9")),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor("#0ea5e9")),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#e2e8f0")),
-            ('PADDING', (0, 0), (-1, -1), 12),
-            ('FONTSIZE', (0, 1), (-1, 1), 14),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ]))
-        elements.append(summary_table)
-        elements.append(Spacer(1, 0.4 * inch))
-
-        # 3. Equipment Detailed Logs
-        elements.append(Paragraph("Detailed Equipment Logs", section_header_style))
-        
-        # Table Header
-        data = [['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temp']]
-        for eq in equipment:
-            data.append([
-                eq.equipment_name,
-                eq.equipment_type,
-                f"{eq.flowrate:.1f}",
-                f"{eq.pressure:.1f}",
-                f"{eq.temperature:.1f}"
-            ])
-
-        table = Table(data, hAlign='LEFT', colWidths=[2.2*inch, 1.4*inch, 0.8*inch, 0.8*inch, 0.8*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#0ea5e9")),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8fafc")]),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor("#334155")),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.1, colors.HexColor("#cbd5e1")),
-            ('ALIGN', (2, 0), (-1, -1), 'CENTER'),
-        ]))
-        
-        elements.append(table)
-
-        # Build PDF
-        doc.build(elements)
-
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="Report_{dataset.filename}.pdf"'
+class BatchReportView(APIView):
+    """Reports (and optionally CSV exports) of several datasets, streamed as one ZIP.
+
+    Reports not yet cached are rendered in parallel in a process pool and
+    added to the archive as each finishes.
+    """
+
+    def post(self, request):
+        serializer = BatchReportSerializer(data=request.data)
+        if not serializer.is_valid():
+            field, errors = next(iter(serializer.errors.items()))
+            if isinstance(errors, dict):
+                # ListField reports child errors by index
+                errors = next(iter(errors.values()))
+            return Response({"error": f"{field}: {errors[0]}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        datasets = Dataset.objects.in_bulk(ids)
+        missing = [str(pk) for pk in ids if pk not in datasets]
+        if missing:
+            return Response({"error": f"Datasets not found: {', '.join(missing)}"}, status=status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(
+            batch.stream_zip([datasets[pk] for pk in ids], serializer.validated_data['formats']),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = 'attachment; filename="reports.zip"'
         return response
@@ -0,0 +1,108 @@
+"""Concurrency load test for the read endpoints; standard library only.
+
+Fires GET requests at a running server from a growing number of concurrent
+clients and prints throughput and latency per level. Optionally, a few slow
+clients download a dataset export throughout, the way a large report or a
+client on a poor connection holds a request open. Run it against the same
+number of worker processes under WSGI and under ASGI:
+
+    gunicorn config.wsgi -w 2
+    ASYNC_READ_VIEWS=True gunicorn config.asgi -w 2 -k uvicorn.workers.UvicornWorker
+
+    python load_test.py --dataset <id> --slow-clients 2
+
+A sync worker is held for the whole of a slow download, so once the slow
+clients outnumber the workers every other request queues behind them. An
+async worker only awaits the slow socket and keeps serving the rest.
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+READ_SIZE = 64 * 1024
+
+
+def fetch(url):
+    """Seconds taken to GET ``url`` and read its whole body, or None on failure."""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            while response.read(READ_SIZE):
+                pass
+    except (urllib.error.URLError, OSError):
+        return None
+    return time.perf_counter() - started
+
+
+def slow_download(url, rate, stop):
+    """Download ``url`` over and over at ``rate`` bytes per second until ``stop`` is set."""
+    chunk = max(rate // 10, 1)
+    while not stop.is_set():
+        try:
+            with urllib.request.urlopen(url, timeout=600) as response:
+                while not stop.is_set() and response.read(chunk):
+                    time.sleep(0.1)
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.1)
+
+
+def run_level(urls, concurrency, requests):
+    targets = [urls[i % len(urls)] for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, targets))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(r for r in results if r is not None)
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) if latencies else float('nan'),
+        'p95': latencies[int(0.95 * (len(latencies) - 1))] if latencies else float('nan'),
+        'errors': results.count(None),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base', default='http://localhost:8000/api/')
+    parser.add_argument('--dataset', help="Dataset id the slow clients export.")
+    parser.add_argument('--path', action='append', dest='paths',
+                        help="Endpoint path relative to --base; repeatable (default: summary/ and history/).")
+    parser.add_argument('--levels', default='1,2,4,8,16,32', help="Comma-separated client counts.")
+    parser.add_argument('--requests', type=int, default=10, help="Requests per client at each level.")
+    parser.add_argument('--slow-clients', type=int, default=0, help="Slow export downloads kept open meanwhile.")
+    parser.add_argument('--slow-rate', type=int, default=32, help="KB/s each slow client reads.")
+    args = parser.parse_args(argv)
+    if args.slow_clients and not args.dataset:
+        parser.error("--slow-clients needs --dataset")
+
+    urls = [args.base + path for path in args.paths or ['summary/', 'history/']]
+    # Warm the response cache so every level measures the same work
+    for url in urls:
+        if fetch(url) is None:
+            sys.exit(f"Cannot reach {url}")
+
+    stop = threading.Event()
+    export_url = f"{args.base}datasets/{args.dataset}/export/?format=csv"
+    for _ in range(args.slow_clients):
+        threading.Thread(target=slow_download, args=(export_url, args.slow_rate * 1024, stop), daemon=True).start()
+    if args.slow_clients:
+        # Let the slow downloads get hold of their workers first
+        time.sleep(1)
+
+    try:
+        print(f"{'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6}")
+        for concurrency in (int(level) for level in args.levels.split(',')):
+            result = run_level(urls, concurrency, concurrency * args.requests)
+            print(f"{concurrency:>7} {result['rps']:>8.1f} {result['p50'] * 1000:>8.1f} "
+                  f"{result['p95'] * 1000:>8.1f} {result['errors']:>6}")
+    finally:
+        stop.set()
+
+
+if __name__ == '__main__':
+    main()
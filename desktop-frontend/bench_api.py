@@ -0,0 +1,127 @@
+"""Page-switch latency of the desktop APIManager against a local stand-in server.
+
+A page switch fetches summary/ and history/. This compares the old
+one-connection-per-call ``requests.get`` with APIManager's pooled keep-alive
+session. The stand-in server can delay each new connection to stand in for
+the TCP (and TLS) handshake round trips of a real network:
+
+    python bench_api.py --switches 200 --connect-delay 20
+"""
+import argparse
+import gzip
+import json
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import main
+
+SUMMARY = {
+    "dataset_id": "00000000-0000-0000-0000-000000000000",
+    "filename": "plant.csv",
+    "total_count": 100000,
+    "avg_flowrate": 120.0, "avg_pressure": 6.0, "avg_temperature": 110.0,
+    "type_distribution": [
+        {"equipment_type": t, "count": 1000, "avg_flow": 120.0, "avg_press": 6.0, "avg_temp": 110.0}
+        for t in ("Pump", "Valve", "Reactor", "Compressor")
+    ],
+    "sampling": {"strategy": "stratified", "points": 500},
+    "raw_data_points": [
+        {"equipment_name": f"EQ-{i:07d}", "flowrate": round(random.gauss(120, 30), 2),
+         "pressure": round(random.gauss(6, 1.5), 2), "temperature": round(random.gauss(110, 25), 2)}
+        for i in range(500)
+    ],
+}
+HISTORY = [
+    {"id": f"00000000-0000-0000-0000-00000000000{i}", "filename": f"plant-{i}.csv",
+     "upload_date": "2026-01-01T00:00:00Z", "total_records": 100000,
+     "avg_flowrate": 120.0, "avg_pressure": 6.0, "avg_temperature": 110.0}
+    for i in range(5)
+]
+BODIES = {"/api/summary/": json.dumps(SUMMARY).encode(), "/api/history/": json.dumps(HISTORY).encode()}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Headers and body go out as separate writes; without this, Nagle and delayed
+    # ACKs stall every reply on a reused connection, which real servers avoid
+    disable_nagle_algorithm = True
+    connect_delay = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with StandInHandler.lock:
+            StandInHandler.connections += 1
+        time.sleep(self.connect_delay)
+        super().setup()
+
+    def do_GET(self):
+        body = BODIES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def switch_fresh(base):
+    # The old APIManager: a new connection for every call
+    for endpoint in ("summary/", "history/"):
+        requests.get(f"{base}{endpoint}").json()
+
+
+def switch_pooled(api, base):
+    for endpoint in ("summary/", "history/"):
+        api.session.get(f"{base}{endpoint}", timeout=api.timeout).json()
+
+
+def measure(name, switch, switches):
+    StandInHandler.connections = 0
+    timings = []
+    for _ in range(switches):
+        started = time.perf_counter()
+        switch()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"{name:<8} p50 {statistics.median(timings) * 1000:7.2f} ms  "
+          f"p95 {timings[int(0.95 * (len(timings) - 1))] * 1000:7.2f} ms  "
+          f"connections {StandInHandler.connections}")
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--switches", type=int, default=200)
+    parser.add_argument("--connect-delay", type=float, default=0.0,
+                        help="Milliseconds added to every new connection.")
+    args = parser.parse_args(argv)
+
+    StandInHandler.connect_delay = args.connect_delay / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}/api/"
+    try:
+        print(f"{args.switches} page switches (summary/ + history/), "
+              f"{args.connect_delay:g} ms per new connection")
+        measure("fresh", lambda: switch_fresh(base), args.switches)
+        api = main.APIManager()
+        measure("pooled", lambda: switch_pooled(api, base), args.switches)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    run()
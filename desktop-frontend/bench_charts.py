@@ -0,0 +1,105 @@
+"""Dashboard chart refresh latency with a large scatter.
+
+Compares the old refresh (clear each figure, rebuild and restyle its axes,
+full canvas.draw()) with DashboardPage.update_charts, which updates the
+artists in place and blits the scatter when its limits stay put. Each
+refresh is timed until Qt has painted it:
+
+    QT_QPA_PLATFORM=offscreen python bench_charts.py --points 10000
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+import main
+
+TYPES = ['Reactor', 'Pump', 'Heat Exchanger', 'Compressor', 'Valve', 'Condenser']
+
+
+def summary(points, rng):
+    return {
+        "type_distribution": [
+            {"equipment_type": t, "count": int(rng.integers(100, 1000)),
+             "avg_flow": rng.normal(120, 5), "avg_press": rng.normal(6, 0.5), "avg_temp": rng.normal(110, 5)}
+            for t in TYPES
+        ],
+        "raw_data_points": [
+            {"temperature": t, "pressure": p}
+            for t, p in zip(rng.normal(110, 25, points), rng.normal(6, 1.5, points))
+        ],
+    }
+
+
+def redraw_from_scratch(page, data):
+    # The previous DashboardPage.load_data chart code
+    page.dist_chart.figure.clear()
+    ax1 = page.dist_chart.figure.add_subplot(111)
+    page.style_axes(ax1, "Units by Equipment Type")
+    types = [d['equipment_type'] for d in data['type_distribution']]
+    counts = [d['count'] for d in data['type_distribution']]
+    ax1.bar(types, counts, color=main.COLORS['primary'], alpha=0.7)
+    page.dist_chart.canvas.draw()
+
+    page.scatter_chart.figure.clear()
+    ax2 = page.scatter_chart.figure.add_subplot(111)
+    page.style_axes(ax2, "Pressure vs Temperature Scatter")
+    temps = [p['temperature'] for p in data['raw_data_points']]
+    pressures = [p['pressure'] for p in data['raw_data_points']]
+    ax2.scatter(temps, pressures, color=main.COLORS['secondary'], alpha=0.6, s=30)
+    ax2.set_xlabel("Temp (°C)", color='#64748b', fontsize=8)
+    ax2.set_ylabel("Pressure (PSI)", color='#64748b', fontsize=8)
+    page.scatter_chart.canvas.draw()
+
+    page.metrics_chart.figure.clear()
+    ax3 = page.metrics_chart.figure.add_subplot(111)
+    page.style_axes(ax3, "Average Metrics Comparison")
+    ax3.plot(types, [d['avg_flow'] for d in data['type_distribution']], marker='o', label='Flow',
+             color=main.COLORS['primary'], linewidth=2)
+    ax3.plot(types, [d['avg_press'] for d in data['type_distribution']], marker='s', label='Press',
+             color=main.COLORS['secondary'], linewidth=2)
+    ax3.legend(facecolor='#1e293b', edgecolor='#334155', fontsize=8, labelcolor='white')
+    page.metrics_chart.canvas.draw()
+
+
+def measure(app, name, refresh, datasets):
+    timings = []
+    for data in datasets:
+        started = time.perf_counter()
+        refresh(data)
+        # Run the queued draw_idle/paint events
+        app.processEvents()
+        timings.append(time.perf_counter() - started)
+    timings = timings[1:]  # the first refresh also lays out the figure
+    print(f"{name:<10} median {statistics.median(timings) * 1000:8.1f} ms  max {max(timings) * 1000:8.1f} ms")
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--refreshes", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    rng = np.random.default_rng(0)
+    datasets = [summary(args.points, rng) for _ in range(args.refreshes + 1)]
+    print(f"{args.refreshes} dashboard refreshes, {args.points} scatter points")
+
+    old = main.DashboardPage()
+    # Its figures get cleared, so the blitting layer must not paint into them
+    old.scatter_chart.canvas.mpl_disconnect(old.scatter.draw_cid)
+    old.resize(1200, 850)
+    old.show()
+    measure(app, "redraw", lambda data: redraw_from_scratch(old, data), datasets)
+
+    new = main.DashboardPage()
+    new.resize(1200, 850)
+    new.show()
+    measure(app, "in place", new.update_charts, datasets)
+
+
+if __name__ == "__main__":
+    run()
@@ -1,6 +1,16 @@
+import io
+import os
 import sys
+import json
+import time
 import base64
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import webbrowser
 import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
@@ -8,11 +18,12 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QStackedWidget, QFileDialog, QTableWidget, QTableWidgetItem,
                              QHeaderView, QMessageBox, QDialog, QFrame, QGraphicsDropShadowEffect,
                              QScrollArea, QGridLayout)
-from PyQt5.QtCore import Qt, QSize, pyqtSignal
+from PyQt5.QtCore import Qt, QSize, pyqtSignal, QObject, QRunnable, QThreadPool, QStandardPaths, QTimer
 from PyQt5.QtGui import QColor, QFont, QIcon
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
+import numpy as np
 
 # Styling Constants
 COLORS = {
@@ -148,30 +159,159 @@ QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
 """
 
 API_BASE = "http://localhost:8000/api/"
+JOB_POLL_INTERVAL = 0.5  # seconds between upload job status checks
+REPORT_WAIT_TIMEOUT = 300  # seconds to wait for the server to render a report
+REQUEST_THREADS = 4  # concurrent API calls off the GUI thread
+CONNECT_TIMEOUT = 3.05  # seconds
+READ_TIMEOUT = 30  # seconds without a byte from the server
+UPLOAD_READ_TIMEOUT = None  # no limit: the server stores the whole file before it answers
+RETRIES = 3  # for idempotent calls, with exponential backoff
+CACHE_MEMORY_ENTRIES = 32  # responses kept in memory; the disk store keeps CACHE_DISK_ENTRIES
+CACHE_DISK_ENTRIES = 256
+DENSITY_THRESHOLD = 20000  # datasets with more rows draw the scatter as a density image
+DENSITY_PIXELS = 2  # screen pixels per density bin
+DENSITY_DELAY = 50  # ms of pan/zoom quiet before the visible window is re-binned
+
+def cache_dir():
+    # ~/.config on Linux, AppData/Local on Windows, Library/Preferences on macOS
+    root = QStandardPaths.writableLocation(QStandardPaths.GenericConfigLocation) or os.path.expanduser("~/.config")
+    return os.path.join(root, "ChemVisualizer", "cache")
+
+class ResponseCache:
+    """Validated GET responses: an in-memory LRU in front of one JSON file per URL on disk.
+
+    Entries are ``(etag, body)``; only responses with an ETag are stored, as
+    they are the ones that can be revalidated. The disk store survives
+    restarts, so pages render from it before the first request completes.
+    """
+
+    def __init__(self, directory, memory_entries=CACHE_MEMORY_ENTRIES, disk_entries=CACHE_DISK_ENTRIES):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()  # shared by the GUI and request threads
+
+    def path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def get(self, url):
+        with self.lock:
+            if url in self.memory:
+                self.memory.move_to_end(url)
+                return self.memory[url]
+        try:
+            with open(self.path(url), encoding="utf-8") as f:
+                stored = json.load(f)
+            os.utime(self.path(url))  # recency for disk eviction
+        except (OSError, ValueError):
+            return None
+        entry = (stored["etag"], stored["body"])
+        self.remember(url, entry)
+        return entry
+
+    def put(self, url, etag, body):
+        entry = (etag, body)
+        self.remember(url, entry)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": etag, "body": body}, f)
+            os.replace(tmp, self.path(url))
+            self.evict()
+        except OSError as e:
+            # The cache is an optimization; a read-only or full disk must not break the app
+            print(f"Cache Error: {e}")
+        return entry
+
+    def remember(self, url, entry):
+        with self.lock:
+            self.memory[url] = entry
+            self.memory.move_to_end(url)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def evict(self):
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+        if len(files) <= self.disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.disk_entries]:
+            os.remove(path)
 
 class APIManager:
-    def __init__(self):
-        self.auth_header = None
+    def __init__(self, pool_size=REQUEST_THREADS, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=RETRIES, cache=None):
+        self.cache = cache or ResponseCache(cache_dir())
+        self.timeout = timeout
+        # One keep-alive pool shared by every call, sized for the request threads
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        retry = Retry(
+            total=retries,
+            read=min(retries, 1),  # a server that timed out once is likely busy; don't wait READ_TIMEOUT over and over
+            backoff_factor=0.5,  # 0.5s, 1s, 2s...
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),  # never replay an upload
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def login(self, username, password):
         token = base64.b64encode(f"{username}:{password}".encode()).decode()
-        self.auth_header = {"Authorization": f"Basic {token}"}
+        self.session.headers["Authorization"] = f"Basic {token}"
         return True
 
+    def cached(self, endpoint):
+        """Last body seen for a GET endpoint (possibly from a previous run), or None."""
+        entry = self.cache.get(f"{API_BASE}{endpoint}")
+        return entry[1] if entry else None
+
     def get(self, endpoint):
+        """GET an endpoint, revalidating a cached copy with If-None-Match.
+
+        A 304 returns the very object ``cached()`` returns, so callers that
+        already rendered the cached copy can skip re-rendering with ``is``.
+        """
+        url = f"{API_BASE}{endpoint}"
         try:
-            response = requests.get(f"{API_BASE}{endpoint}", headers=self.auth_header)
+            headers = {}
+            cached = self.cache.get(url)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                return cached[1]
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            if response.headers.get("ETag"):
+                self.cache.put(url, response.headers["ETag"], data)
+            return data
         except Exception as e:
             print(f"API Error: {e}")
             return None
 
-    def post_file(self, endpoint, filepath):
+    def get_columns(self, dataset_id):
+        """Fetch a dataset as NumPy columns from the binary .npz export."""
+        try:
+            response = self.session.get(f"{API_BASE}datasets/{dataset_id}/columns/",
+                                        headers={"Accept": "application/x-npz"}, timeout=self.timeout)
+            response.raise_for_status()
+            with np.load(io.BytesIO(response.content)) as archive:
+                return {name: archive[name] for name in archive.files}
+        except Exception as e:
+            print(f"API Error: {e}")
+            return None
+
+    def post_file(self, endpoint, filepath, on_progress=None):
         try:
             with open(filepath, 'rb') as f:
                 files = {'file': f}
-                response = requests.post(f"{API_BASE}{endpoint}", files=files, headers=self.auth_header)
+                response = self.session.post(f"{API_BASE}{endpoint}", files=files,
+                                             timeout=(self.timeout[0], UPLOAD_READ_TIMEOUT))
                 
                 # Try to parse JSON, regardless of status code
                 try:
@@ -182,14 +322,173 @@ class APIManager:
                 if response.status_code >= 400:
                     err = res_data.get("error") if isinstance(res_data, dict) else str(res_data)
                     return {"error": err or "Unknown server error"}
-                
-                return res_data
+
+            # The server ingests in the background; follow the job until it settles
+            if response.status_code == 202:
+                return self.wait_for_job(res_data['id'], on_progress)
+            return res_data
         except Exception as e:
             print(f"Upload Error: {e}")
             return {"error": f"Connection Error: {str(e)}"}
 
+    def wait_for_job(self, job_id, on_progress=None):
+        while True:
+            job = self.get(f"jobs/{job_id}/")
+            if job is None:
+                return {"error": "Lost track of the upload job"}
+            if on_progress:
+                on_progress(job)
+            if job['state'] == 'succeeded':
+                return job
+            if job['state'] == 'failed':
+                return {"error": job['error'] or "Upload job failed"}
+            time.sleep(JOB_POLL_INTERVAL)
+
+    def wait_for_report(self, dataset_id, on_wait=None):
+        """Poll until the server has rendered a report; returns an error message or None."""
+        deadline = time.monotonic() + REPORT_WAIT_TIMEOUT
+        try:
+            while time.monotonic() < deadline:
+                response = self.session.head(f"{API_BASE}report/{dataset_id}/", timeout=self.timeout)
+                if response.status_code == 200:
+                    return None
+                if response.status_code != 202:
+                    return f"Server Error ({response.status_code})"
+                # Retry-After says how long the render is expected to take; stay responsive meanwhile
+                wait_until = time.monotonic() + float(response.headers.get("Retry-After", 1))
+                while time.monotonic() < wait_until:
+                    if on_wait:
+                        on_wait()
+                    time.sleep(0.1)
+            return "Timed out waiting for the report"
+        except Exception as e:
+            return f"Connection Error: {str(e)}"
+
+    def download_batch(self, dataset_ids, filepath, on_chunk=None):
+        """Stream a ZIP of several datasets' reports to filepath; returns an error message or None."""
+        try:
+            # The first bytes wait on a render, so allow as long as a single report may take
+            with self.session.post(f"{API_BASE}reports/batch/", json={"ids": dataset_ids},
+                                   timeout=(self.timeout[0], REPORT_WAIT_TIMEOUT), stream=True) as response:
+                if response.status_code >= 400:
+                    try:
+                        return response.json().get("error") or f"Server Error ({response.status_code})"
+                    except ValueError:
+                        return f"Server Error ({response.status_code})"
+                # Reports are appended as the server finishes them; write them out as they arrive
+                with open(filepath, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+                        if on_chunk:
+                            on_chunk()
+            return None
+        except Exception as e:
+            return f"Connection Error: {str(e)}"
+
 api = APIManager()
 
+class RequestCancelled(Exception):
+    pass
+
+class RequestSignals(QObject):
+    # Emitted from pool threads; delivered to the GUI thread as queued events
+    finished = pyqtSignal(int, object)
+    progress = pyqtSignal(int, object)
+
+class RequestRunnable(QRunnable):
+    def __init__(self, task_id, fn, signals):
+        super().__init__()
+        # The pool holds a raw pointer; RequestPool keeps the Python object alive until finished
+        self.setAutoDelete(False)
+        self.task_id = task_id
+        self.fn = fn
+        self.signals = signals
+        self.cancelled = False
+
+    def report(self, value=None):
+        """Progress hook handed to the call; also where a cancelled call stops."""
+        if self.cancelled:
+            raise RequestCancelled()
+        self.signals.progress.emit(self.task_id, value)
+
+    def run(self):
+        result = None
+        try:
+            if not self.cancelled:
+                result = self.fn(self.report)
+        except RequestCancelled:
+            pass
+        except Exception as e:
+            result = {"error": str(e)}
+        self.signals.finished.emit(self.task_id, result)
+
+class RequestPool(QObject):
+    """Runs blocking APIManager calls on a QThreadPool and hands results back on the GUI thread.
+
+    Calls are submitted under a key; submitting a key that is already in
+    flight subscribes to the running call instead of starting another one.
+    Each subscription belongs to an owner widget, and ``cancel(owner)`` drops
+    that widget's callbacks, stopping the call once nobody is waiting on it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(REQUEST_THREADS)
+        self.signals = RequestSignals()
+        self.signals.finished.connect(self._finished)
+        self.signals.progress.connect(self._progress)
+        self.tasks = {}  # task id -> (key, runnable, [(owner, on_result, on_progress)])
+        self.in_flight = {}  # key -> task id
+        self.next_id = 0
+
+    def submit(self, key, fn, owner, on_result, on_progress=None):
+        """Run ``fn(report)`` in the pool; ``on_result`` gets its return value.
+
+        ``fn`` may call ``report(value)`` to pass ``value`` to ``on_progress``.
+        """
+        subscriber = (owner, on_result, on_progress)
+        if key in self.in_flight:
+            self.tasks[self.in_flight[key]][2].append(subscriber)
+            return
+        self.next_id += 1
+        runnable = RequestRunnable(self.next_id, fn, self.signals)
+        self.tasks[self.next_id] = (key, runnable, [subscriber])
+        self.in_flight[key] = self.next_id
+        self.pool.start(runnable)
+
+    def cancel(self, owner):
+        for task_id, (key, runnable, subscribers) in list(self.tasks.items()):
+            if runnable.cancelled:
+                continue
+            subscribers[:] = [s for s in subscribers if s[0] is not owner]
+            if subscribers:
+                continue
+            runnable.cancelled = True
+            if self.in_flight.get(key) == task_id:
+                del self.in_flight[key]
+            # A call that already started stops at its next report() and is dropped in _finished
+            if self.pool.tryTake(runnable):
+                del self.tasks[task_id]
+
+    def _finished(self, task_id, result):
+        key, runnable, subscribers = self.tasks.pop(task_id)
+        if runnable.cancelled:
+            return
+        del self.in_flight[key]
+        for owner, on_result, on_progress in subscribers:
+            on_result(result)
+
+    def _progress(self, task_id, value):
+        key, runnable, subscribers = self.tasks[task_id]
+        if runnable.cancelled:
+            return
+        for owner, on_result, on_progress in subscribers:
+            if on_progress:
+                on_progress(value)
+
+request_pool = RequestPool()
+
 class StatCard(QFrame):
     def __init__(self, title, value, color="#0ea5e9"):
         super().__init__()
@@ -215,7 +514,7 @@ class StatCard(QFrame):
         layout.addWidget(self.value_lbl)
 
 class ChartContainer(QFrame):
-    def __init__(self, title):
+    def __init__(self, title, toolbar=False):
         super().__init__()
         self.setStyleSheet(f"""
             QFrame {{
@@ -234,6 +533,123 @@ class ChartContainer(QFrame):
         self.figure = Figure(facecolor='#1e293b')
         self.canvas = FigureCanvas(self.figure)
         layout.addWidget(self.canvas)
+        if toolbar:
+            self.toolbar = NavigationToolbar(self.canvas, self)
+            self.toolbar.setStyleSheet("background-color: #e2e8f0; border: none; border-radius: 6px;")
+            layout.addWidget(self.toolbar)
+
+class ScatterLayer:
+    """Scatter points redrawn by blitting while the axes limits stay put.
+
+    The points are an animated artist: full draws leave them out, and the
+    draw_event handler keeps that clean background and paints them on top.
+    A refresh whose points fit the current limits then only restores the
+    background and redraws the points; otherwise the limits change and a
+    full draw is scheduled with draw_idle.
+    """
+    HEADROOM = 0.15
+
+    def __init__(self, canvas, ax, **style):
+        self.canvas = canvas
+        self.ax = ax
+        self.artist = ax.scatter([], [], animated=True, **style)
+        self.background = None
+        self.draw_cid = canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.artist)
+
+    def set_points(self, x, y):
+        offsets = np.column_stack([x, y]) if len(x) else np.empty((0, 2))
+        self.artist.set_offsets(offsets)
+        if self.background is not None and self.fits(offsets):
+            self.canvas.restore_region(self.background)
+            self.ax.draw_artist(self.artist)
+            self.canvas.blit(self.ax.bbox)
+            return
+        if len(offsets):
+            # Pad generously so the next sample of similar data still fits and can blit
+            low, high = offsets.min(axis=0), offsets.max(axis=0)
+            pad = np.where(high > low, (high - low) * self.HEADROOM, 1.0)
+            self.ax.set_xlim(low[0] - pad[0], high[0] + pad[0])
+            self.ax.set_ylim(low[1] - pad[1], high[1] + pad[1])
+        self.canvas.draw_idle()
+
+    def fits(self, offsets):
+        # Keep the limits while the points stay inside them and fill at least half of each axis
+        if not len(offsets):
+            return True
+        for (low, high), values in ((self.ax.get_xlim(), offsets[:, 0]), (self.ax.get_ylim(), offsets[:, 1])):
+            span = values.max() - values.min()
+            if values.min() < low or values.max() > high or span < (high - low) / 2:
+                return False
+        return True
+
+class DensityLayer:
+    """Point counts binned on a grid and shown as an image, for datasets too big to scatter.
+
+    Only the visible window is binned, at about DENSITY_PIXELS screen pixels
+    per bin, so zooming in brings back detail. Pan/zoom limit changes restart
+    a short timer and the window is re-binned once they settle.
+    """
+
+    def __init__(self, canvas, ax, cmap='plasma'):
+        self.canvas = canvas
+        self.ax = ax
+        self.x = self.y = None
+        self.dataset_id = None
+        cmap = plt.get_cmap(cmap).with_extremes(bad=(0, 0, 0, 0))  # empty bins show the axes background
+        self.image = ax.imshow(np.ma.masked_all((1, 1)), cmap=cmap, origin='lower', aspect='auto',
+                               interpolation='nearest', visible=False, zorder=2)
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DENSITY_DELAY)
+        self.timer.timeout.connect(self.aggregate)
+        ax.callbacks.connect('xlim_changed', self.on_limits)
+        ax.callbacks.connect('ylim_changed', self.on_limits)
+
+    @property
+    def active(self):
+        return self.x is not None
+
+    def set_points(self, dataset_id, x, y):
+        self.dataset_id = dataset_id
+        self.x, self.y = x, y
+        self.image.set_visible(True)
+        pad_x = (x.max() - x.min()) * 0.05 or 0.5
+        pad_y = (y.max() - y.min()) * 0.05 or 0.5
+        self.ax.set_xlim(x.min() - pad_x, x.max() + pad_x)
+        self.ax.set_ylim(y.min() - pad_y, y.max() + pad_y)
+        self.aggregate()
+
+    def clear(self):
+        self.dataset_id = None
+        self.x = self.y = None
+        self.timer.stop()
+        self.image.set_visible(False)
+
+    def on_limits(self, ax):
+        if self.active:
+            self.timer.start()
+
+    def aggregate(self):
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        nx = max(int(self.ax.bbox.width / DENSITY_PIXELS), 1)
+        ny = max(int(self.ax.bbox.height / DENSITY_PIXELS), 1)
+        # Bin with bincount rather than histogram2d: one pass, no per-point bin search
+        visible = (self.x >= x0) & (self.x < x1) & (self.y >= y0) & (self.y < y1)
+        # Rounding can put a point just inside the upper limit into bin n
+        ix = np.minimum(((self.x[visible] - x0) * (nx / (x1 - x0))).astype(np.intp), nx - 1)
+        iy = np.minimum(((self.y[visible] - y0) * (ny / (y1 - y0))).astype(np.intp), ny - 1)
+        counts = np.bincount(iy * nx + ix, minlength=nx * ny).reshape(ny, nx)
+        # Log scale keeps sparse outliers visible next to the dense core
+        shade = np.ma.masked_equal(np.log1p(counts), 0)
+        self.image.set_data(shade)
+        self.image.set_extent((x0, x1, y0, y1))
+        self.image.set_clim(0, shade.max() if shade.count() else 1)
+        self.canvas.draw_idle()
 
 class DashboardPage(QWidget):
     def __init__(self):
@@ -286,7 +702,7 @@ class DashboardPage(QWidget):
         charts_grid = QGridLayout()
         charts_grid.setSpacing(20)
         
-        self.scatter_chart = ChartContainer("Pressure vs Temp (Correlation)")
+        self.scatter_chart = ChartContainer("Pressure vs Temp (Correlation)", toolbar=True)
         self.metrics_chart = ChartContainer("Avg Metrics by Type")
         self.dist_chart = ChartContainer("Equipment Distribution")
         
@@ -312,6 +728,28 @@ class DashboardPage(QWidget):
         charts_grid.addWidget(self.stats_table_container, 1, 1)
         
         self.content_layout.addLayout(charts_grid)
+        self.init_charts()
+
+    def init_charts(self):
+        # Axes and artists are built once; refreshes update them in place
+        self.dist_ax = self.dist_chart.figure.add_subplot(111)
+        self.style_axes(self.dist_ax, "Units by Equipment Type")
+        self.dist_bars = []
+
+        self.scatter_ax = self.scatter_chart.figure.add_subplot(111)
+        self.style_axes(self.scatter_ax, "Pressure vs Temperature Scatter")
+        self.scatter_ax.set_xlabel("Temp (°C)", color='#64748b', fontsize=8)
+        self.scatter_ax.set_ylabel("Pressure (PSI)", color='#64748b', fontsize=8)
+        self.scatter = ScatterLayer(self.scatter_chart.canvas, self.scatter_ax,
+                                    color=COLORS['secondary'], alpha=0.6, s=30)
+        self.density = DensityLayer(self.scatter_chart.canvas, self.scatter_ax)
+        self.scatter_dataset_id = None
+
+        self.metrics_ax = self.metrics_chart.figure.add_subplot(111)
+        self.style_axes(self.metrics_ax, "Average Metrics Comparison")
+        self.flow_line, = self.metrics_ax.plot([], [], marker='o', label='Flow', color=COLORS['primary'], linewidth=2)
+        self.press_line, = self.metrics_ax.plot([], [], marker='s', label='Press', color=COLORS['secondary'], linewidth=2)
+        self.metrics_ax.legend(facecolor='#1e293b', edgecolor='#334155', fontsize=8, labelcolor='white')
 
     def style_axes(self, ax, title):
         ax.set_facecolor('#1e293b')
@@ -323,8 +761,66 @@ class DashboardPage(QWidget):
         ax.set_title(title, color='white', fontsize=10, pad=10)
         ax.grid(True, color='#ffffff', alpha=0.05, linestyle='--')
 
+    def update_charts(self, data):
+        types = [d['equipment_type'] for d in data['type_distribution']]
+        positions = range(len(types))
+
+        # Distribution: bar heights change in place; bars are rebuilt only when the types do
+        counts = [d['count'] for d in data['type_distribution']]
+        if len(self.dist_bars) == len(types):
+            for bar, count in zip(self.dist_bars, counts):
+                bar.set_height(count)
+        else:
+            for bar in self.dist_bars:
+                bar.remove()
+            self.dist_bars = list(self.dist_ax.bar(positions, counts, color=COLORS['primary'], alpha=0.7))
+        self.dist_ax.set_xticks(positions, types)
+        self.dist_ax.relim()
+        self.dist_ax.autoscale_view()
+        self.dist_chart.canvas.draw_idle()
+
+        self.update_scatter(data)
+
+        # Metrics lines
+        self.flow_line.set_data(positions, [d['avg_flow'] for d in data['type_distribution']])
+        self.press_line.set_data(positions, [d['avg_press'] for d in data['type_distribution']])
+        self.metrics_ax.set_xticks(positions, types)
+        self.metrics_ax.relim()
+        self.metrics_ax.autoscale_view()
+        self.metrics_chart.canvas.draw_idle()
+
+    def update_scatter(self, data):
+        dataset_id = data.get('dataset_id')
+        if self.density.active and self.density.dataset_id == dataset_id:
+            # Still the same dataset: keep the density image and the user's zoom
+            return
+        self.scatter_dataset_id = dataset_id
+        self.density.clear()
+        self.scatter.artist.set_visible(True)
+        points = data['raw_data_points']
+        self.scatter.set_points(np.fromiter((p['temperature'] for p in points), float, len(points)),
+                                np.fromiter((p['pressure'] for p in points), float, len(points)))
+        if data.get('total_count', 0) > DENSITY_THRESHOLD:
+            # The sampled points stand in until the whole dataset has arrived
+            request_pool.submit(f"columns/{dataset_id}/", lambda report: api.get_columns(dataset_id), self,
+                                lambda columns: self.show_density(dataset_id, columns))
+
+    def show_density(self, dataset_id, columns):
+        if not columns or not len(columns['temperature']) or dataset_id != self.scatter_dataset_id:
+            return
+        self.scatter.artist.set_visible(False)
+        self.density.set_points(dataset_id, columns['temperature'], columns['pressure'])
+        self.scatter_chart.toolbar.update()  # the full view becomes Home
+
     def load_data(self):
-        data = api.get("summary/")
+        # Render the cached copy at once, then show the server's answer if it differs
+        cached = api.cached("summary/")
+        if cached:
+            self.show_data(cached)
+        request_pool.submit("summary/", lambda report: api.get("summary/"), self,
+                            lambda data: data is not cached and self.show_data(data))
+
+    def show_data(self, data):
         if not data: return
 
         self.total_card.value_lbl.setText(str(data['total_count']))
@@ -332,36 +828,7 @@ class DashboardPage(QWidget):
         self.press_card.value_lbl.setText(f"{data['avg_pressure']:.1f} PSI")
         self.temp_card.value_lbl.setText(f"{data['avg_temperature']:.1f} °C")
 
-        # Update Distribution Chart
-        self.dist_chart.figure.clear()
-        ax1 = self.dist_chart.figure.add_subplot(111)
-        self.style_axes(ax1, "Units by Equipment Type")
-        types = [d['equipment_type'] for d in data['type_distribution']]
-        counts = [d['count'] for d in data['type_distribution']]
-        ax1.bar(types, counts, color=COLORS['primary'], alpha=0.7)
-        self.dist_chart.canvas.draw()
-
-        # Update Scatter Chart
-        self.scatter_chart.figure.clear()
-        ax2 = self.scatter_chart.figure.add_subplot(111)
-        self.style_axes(ax2, "Pressure vs Temperature Scatter")
-        temps = [p['temperature'] for p in data['raw_data_points']]
-        pressures = [p['pressure'] for p in data['raw_data_points']]
-        ax2.scatter(temps, pressures, color=COLORS['secondary'], alpha=0.6, s=30)
-        ax2.set_xlabel("Temp (°C)", color='#64748b', fontsize=8)
-        ax2.set_ylabel("Pressure (PSI)", color='#64748b', fontsize=8)
-        self.scatter_chart.canvas.draw()
-
-        # Update Metrics Line Chart
-        self.metrics_chart.figure.clear()
-        ax3 = self.metrics_chart.figure.add_subplot(111)
-        self.style_axes(ax3, "Average Metrics Comparison")
-        avg_flows = [d['avg_flow'] for d in data['type_distribution']]
-        avg_presss = [d['avg_press'] for d in data['type_distribution']]
-        ax3.plot(types, avg_flows, marker='o', label='Flow', color=COLORS['primary'], linewidth=2)
-        ax3.plot(types, avg_presss, marker='s', label='Press', color=COLORS['secondary'], linewidth=2)
-        ax3.legend(facecolor='#1e293b', edgecolor='#334155', fontsize=8, labelcolor='white')
-        self.metrics_chart.canvas.draw()
+        self.update_charts(data)
 
         # Update Statistical Breakdown List
         while self.stats_scroll_layout.count():
@@ -425,14 +892,24 @@ class UploadPage(QWidget):
         fname, _ = QFileDialog.getOpenFileName(self, 'Open CSV', '.', "CSV Files (*.csv)")
         if fname:
             self.status_lbl.setText(f"Processing: {fname.split('/')[-1]}")
-            res = api.post_file("upload/", fname)
-            if res and "error" not in res:
-                QMessageBox.information(self, "Success", "Data processed successfully.")
-                self.status_lbl.setText("Upload Complete!")
-            else:
-                err_msg = res.get("error") if res else "Failed to connect to server."
-                QMessageBox.warning(self, "Upload Failed", f"Error: {err_msg}")
-                self.status_lbl.setText("Upload Failed")
+            self.btn.setEnabled(False)
+            # Not owned by the page: an upload carries on when the user navigates away
+            request_pool.submit(f"upload:{fname}",
+                                lambda report: api.post_file("upload/", fname, on_progress=report),
+                                None, self.upload_done, on_progress=self.show_progress)
+
+    def upload_done(self, res):
+        self.btn.setEnabled(True)
+        if res and "error" not in res:
+            QMessageBox.information(self, "Success", "Data processed successfully.")
+            self.status_lbl.setText("Upload Complete!")
+        else:
+            err_msg = res.get("error") if res else "Failed to connect to server."
+            QMessageBox.warning(self, "Upload Failed", f"Error: {err_msg}")
+            self.status_lbl.setText("Upload Failed")
+
+    def show_progress(self, job):
+        self.status_lbl.setText(f"Processing: {job['filename']} ({job['rows_processed']:,} rows)")
 
 class HistoryPage(QWidget):
     def __init__(self):
@@ -452,15 +929,35 @@ class HistoryPage(QWidget):
         self.table.verticalHeader().setVisible(False)
         layout.addWidget(self.table)
         
+        btn_row = QHBoxLayout()
+        btn_row.addStretch()
+        self.download_all_btn = QPushButton("Download All")
+        self.download_all_btn.setObjectName("PrimaryBtn")
+        self.download_all_btn.setFixedWidth(150)
+        self.download_all_btn.clicked.connect(self.download_all)
+        btn_row.addWidget(self.download_all_btn)
+
         self.refresh_btn = QPushButton("Refresh History")
         self.refresh_btn.setObjectName("PrimaryBtn")
         self.refresh_btn.setFixedWidth(150)
         self.refresh_btn.clicked.connect(self.load_history)
-        layout.addWidget(self.refresh_btn, alignment=Qt.AlignRight)
+        btn_row.addWidget(self.refresh_btn)
+        layout.addLayout(btn_row)
+        self.dataset_ids = []
+        self.report_buttons = {}  # dataset id -> its row's button, rebuilt on every load
+        self.rendering = set()
     
     def load_history(self):
-        data = api.get("history/")
+        cached = api.cached("history/")
+        if cached:
+            self.show_history(cached)
+        request_pool.submit("history/", lambda report: api.get("history/"), self,
+                            lambda data: data is not cached and self.show_history(data))
+
+    def show_history(self, data):
         if not data: return
+        self.dataset_ids = [row['id'] for row in data]
+        self.report_buttons = {}
             
         self.table.setRowCount(len(data))
         for i, row in enumerate(data):
@@ -469,11 +966,57 @@ class HistoryPage(QWidget):
             self.table.setItem(i, 2, QTableWidgetItem(str(row['total_records'])))
             self.table.setItem(i, 3, QTableWidgetItem(f"{row['avg_flowrate']:.2f}"))
             
-            btn = QPushButton("Download Report")
+            btn = QPushButton()
             btn.setCursor(Qt.PointingHandCursor)
             btn.setStyleSheet(f"background-color: transparent; color: {COLORS['primary']}; font-weight: bold; border: 1px solid {COLORS['primary']}; border-radius: 4px; padding: 4px;")
-            btn.clicked.connect(lambda checked, r=row['id']: webbrowser.open(f"{API_BASE}report/{r}/"))
+            btn.clicked.connect(lambda checked, r=row['id']: self.download_report(r))
             self.table.setCellWidget(i, 4, btn)
+            self.report_buttons[row['id']] = btn
+            self.update_report_button(row['id'])
+
+    def update_report_button(self, dataset_id):
+        btn = self.report_buttons.get(dataset_id)
+        if btn:
+            rendering = dataset_id in self.rendering
+            btn.setEnabled(not rendering)
+            btn.setText("Rendering..." if rendering else "Download Report")
+
+    def download_report(self, dataset_id):
+        # Reports are rendered in the background on first request; open once ready
+        self.rendering.add(dataset_id)
+        self.update_report_button(dataset_id)
+        request_pool.submit(f"report/{dataset_id}/",
+                            lambda report: api.wait_for_report(dataset_id, on_wait=report),
+                            None, lambda err: self.report_ready(dataset_id, err))
+
+    def report_ready(self, dataset_id, err):
+        self.rendering.discard(dataset_id)
+        self.update_report_button(dataset_id)
+        if err:
+            QMessageBox.warning(self, "Report Failed", f"Error: {err}")
+            return
+        webbrowser.open(f"{API_BASE}report/{dataset_id}/")
+
+    def download_all(self):
+        if not self.dataset_ids:
+            return
+        filepath, _ = QFileDialog.getSaveFileName(self, "Save Reports", "reports.zip", "ZIP Archives (*.zip)")
+        if not filepath:
+            return
+        self.download_all_btn.setEnabled(False)
+        self.download_all_btn.setText("Downloading...")
+        dataset_ids = list(self.dataset_ids)
+        request_pool.submit(f"batch:{filepath}",
+                            lambda report: api.download_batch(dataset_ids, filepath, on_chunk=report),
+                            None, lambda err: self.download_all_done(err, len(dataset_ids), filepath))
+
+    def download_all_done(self, err, count, filepath):
+        self.download_all_btn.setText("Download All")
+        self.download_all_btn.setEnabled(True)
+        if err:
+            QMessageBox.warning(self, "Download Failed", f"Error: {err}")
+        else:
+            QMessageBox.information(self, "Download Complete", f"Saved {count} reports to {filepath}")
 
 class SettingsPage(QWidget):
     settingsSaved = pyqtSignal(str, str) # name, role
@@ -675,6 +1218,8 @@ class MainWindow(QMainWindow):
         self.sidebar_avatar.setText(initials)
 
     def switch_page(self, index):
+        # Fetches for the page being left are no longer wanted
+        request_pool.cancel(self.content.currentWidget())
         self.content.setCurrentIndex(index)
         for i, btn in enumerate(self.nav_btns):
             btn.setProperty("active", "true" if i == index else "false")
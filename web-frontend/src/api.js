@@ -2,10 +2,38 @@ import axios from 'axios';
 
 const api = axios.create({
     baseURL: import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api/',
+    // 304 means our stored copy is still current
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
 });
 
 // Add a request interceptor if we implement token auth later
 // For now, Basic Auth is handled in components or global config if needed
 // Or we can set a default Authorization header if we have a token
 
+// Conditional GETs: remember each URL's ETag and body, replay the body on 304
+const etagCache = new Map();
+
+api.interceptors.request.use((config) => {
+    if ((config.method || 'get').toLowerCase() === 'get') {
+        const cached = etagCache.get(api.getUri(config));
+        if (cached) {
+            config.headers['If-None-Match'] = cached.etag;
+        }
+    }
+    return config;
+});
+
+api.interceptors.response.use((response) => {
+    const key = api.getUri(response.config);
+    if (response.status === 304) {
+        const cached = etagCache.get(key);
+        if (cached) {
+            return { ...response, status: 200, data: cached.data };
+        }
+    } else if (response.headers.etag) {
+        etagCache.set(key, { etag: response.headers.etag, data: response.data });
+    }
+    return response;
+});
+
 export default api;
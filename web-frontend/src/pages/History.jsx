@@ -5,6 +5,8 @@ import { FileText, Download, Calendar, Database, Activity } from 'lucide-react';
 const History = () => {
     const [data, setData] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [rendering, setRendering] = useState({});
+    const [downloadingAll, setDownloadingAll] = useState(false);
 
     useEffect(() => {
         api.get('history/')
@@ -18,8 +20,51 @@ const History = () => {
             });
     }, []);
 
-    const downloadReport = (id) => {
-        window.open(`http://localhost:8000/api/report/${id}/`, '_blank');
+    // Reports are rendered in the background on first request; poll until ready
+    const waitForReport = async (url) => {
+        for (;;) {
+            const res = await api.head(url);
+            if (res.status !== 202) return;
+            const retryAfter = Number(res.headers['retry-after']) || 1;
+            await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+        }
+    };
+
+    const downloadReport = async (id) => {
+        // Open the tab now, while we still have the click, so popup blockers allow it
+        const tab = window.open('', '_blank');
+        const url = `report/${id}/`;
+        setRendering((prev) => ({ ...prev, [id]: true }));
+        try {
+            await waitForReport(url);
+            tab.location = api.getUri({ url });
+        } catch (err) {
+            console.error(err);
+            tab.close();
+            alert(err.response?.data?.error || 'Report generation failed');
+        } finally {
+            setRendering((prev) => ({ ...prev, [id]: false }));
+        }
+    };
+
+    const downloadAll = async () => {
+        setDownloadingAll(true);
+        try {
+            const res = await api.post('reports/batch/', { ids: data.map((item) => item.id) }, { responseType: 'blob' });
+            const href = URL.createObjectURL(res.data);
+            const link = document.createElement('a');
+            link.href = href;
+            link.download = 'reports.zip';
+            link.click();
+            URL.revokeObjectURL(href);
+        } catch (err) {
+            console.error(err);
+            // Error bodies arrive as a Blob too
+            const body = err.response?.data ? JSON.parse(await err.response.data.text()) : {};
+            alert(body.error || 'Batch download failed');
+        } finally {
+            setDownloadingAll(false);
+        }
     };
 
     if (loading) {
@@ -37,6 +82,14 @@ const History = () => {
                     <h1 className="text-2xl font-bold text-white uppercase tracking-wider">Dataset History</h1>
                     <p className="text-slate-400 text-sm">Review and download reports for your past uploads.</p>
                 </div>
+                <button
+                    onClick={downloadAll}
+                    disabled={downloadingAll || data.length === 0}
+                    className="inline-flex items-center gap-2 px-4 py-2 rounded-lg bg-primary-500 text-white hover:bg-primary-600 transition-all text-sm font-semibold disabled:opacity-50"
+                >
+                    <Download size={16} />
+                    {downloadingAll ? 'Preparing...' : 'Download All'}
+                </button>
             </div>
 
             <div className="glass-card overflow-hidden">
@@ -83,10 +136,11 @@ const History = () => {
                                     <td className="px-6 py-4 text-right">
                                         <button
                                             onClick={() => downloadReport(item.id)}
+                                            disabled={rendering[item.id]}
                                             className="inline-flex items-center gap-2 px-3 py-1.5 rounded-lg bg-primary-500/10 text-primary-400 hover:bg-primary-500 hover:text-white transition-all text-xs font-semibold"
                                         >
                                             <Download size={14} />
-                                            PDF Report
+                                            {rendering[item.id] ? 'Rendering...' : 'PDF Report'}
                                         </button>
                                     </td>
                                 </tr>
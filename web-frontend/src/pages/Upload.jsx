@@ -1,21 +1,39 @@
-import React from 'react';
+import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import FileUpload from '../components/FileUpload';
 import api from '../api';
 
+const JOB_POLL_INTERVAL = 1000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
 const Upload = () => {
     const navigate = useNavigate();
+    const [job, setJob] = useState(null);
+
+    // The server ingests uploads in the background; poll the job until it settles
+    const waitForJob = async (jobId) => {
+        while (true) {
+            const { data } = await api.get(`jobs/${jobId}/`);
+            setJob(data);
+            if (data.state === 'succeeded') return data;
+            if (data.state === 'failed') throw new Error(data.error);
+            await sleep(JOB_POLL_INTERVAL);
+        }
+    };
 
     const handleUpload = async (file) => {
         const formData = new FormData();
         formData.append('file', file);
 
         try {
-            await api.post('upload/', formData, {
+            const { data } = await api.post('upload/', formData, {
                 headers: {
                     'Content-Type': 'multipart/form-data',
                 },
             });
+            setJob(data);
+            await waitForJob(data.id);
             // Redirect to dashboard after successful upload
             // Add a small delay for the user to see success state
             setTimeout(() => {
@@ -23,7 +41,8 @@ const Upload = () => {
             }, 1000);
         } catch (error) {
             console.error("Upload failed", error);
-            alert("Upload failed. Please try again.");
+            const message = error.response?.data?.error || error.message;
+            alert(`Upload failed: ${message}`);
         }
     };
 
@@ -36,6 +55,14 @@ const Upload = () => {
 
             <FileUpload onUpload={handleUpload} />
 
+            {job && (
+                <div className="glass-card p-4 text-sm text-slate-300">
+                    {job.state === 'failed'
+                        ? <span className="text-red-400">Processing failed: {job.error}</span>
+                        : <span>Processing {job.filename}: {job.rows_processed.toLocaleString()} rows ({job.state})</span>}
+                </div>
+            )}
+
             <div className="glass-card p-6">
                 <h3 className="text-lg font-semibold text-white mb-4">Required Format</h3>
                 <div className="overflow-x-auto">